@@ -1,6 +1,9 @@
 import argparse
 import sys
 import os
+import time
+
+from local_registry import LocalRegistry
 
 def main():
     parser = argparse.ArgumentParser(description='Анализатор зависимостей')
@@ -19,6 +22,7 @@ def main():
     parser.add_argument('--output', default='graph.png')
     parser.add_argument('--max-depth', type=int, default=5)
     parser.add_argument('--filter', default='')
+    parser.add_argument('--index-file', help='Файл индекса локального зеркала')
     
     # Парсим аргументы
     args = parser.parse_args()
@@ -36,6 +40,10 @@ def main():
         print("Ошибка: глубина должна быть > 0")
         sys.exit(1)
     
+    if args.mode == 'local' and not args.repo_path:
+        print("Ошибка: для режима local нужен --repo-path")
+        sys.exit(1)
+    
     # Показываем настройки
     print("Настройки:")
     print(f"  Пакет: {args.package}")
@@ -45,6 +53,27 @@ def main():
     print(f"  Файл: {args.output}")
     print(f"  Глубина: {args.max_depth}")
     print(f"  Фильтр: {args.filter}")
+    
+    if args.mode == 'local':
+        run_local(args)
+
+def run_local(args):
+    """Локальный режим: граф зависимостей по индексу зеркала, без сети"""
+    registry = LocalRegistry(args.repo_path, args.index_file)
+    t0 = time.perf_counter()
+    stats = registry.scan()
+    print(f"Индекс: файлов {stats['files']}, разобрано {stats['parsed']}, "
+          f"удалено {stats['removed']} ({time.perf_counter() - t0:.2f} с)")
+    
+    if registry.location(args.package) is None:
+        print(f"Ошибка: пакет {args.package} не найден в {args.repo_path}")
+        sys.exit(1)
+    
+    graph = registry.resolve(args.package, args.max_depth, args.filter, args.version)
+    print("\nЗависимости:")
+    for package, deps in graph.items():
+        for dep in deps:
+            print(f"  {package} -> {dep}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import zlib
+
+from assembler import _encode_lines
+
+CACHE_VERSION = 1
+
+# Границы блоков определяются содержимым строк: вставка строки меняет только один блок
+BOUNDARY_MASK = 0xFF
+MAX_BLOCK_LINES = 4096
+
+def split_blocks(lines):
+    """Разбить исходник (строки в байтах) на блоки: (номер первой строки, строки, хэш содержимого)"""
+    blocks = []
+    current = []
+    first = 1
+    crc32 = zlib.crc32
+    for line_no, line in enumerate(lines, 1):
+        current.append(line)
+        if crc32(line) & BOUNDARY_MASK == 0 or len(current) >= MAX_BLOCK_LINES:
+            blocks.append((first, current, hashlib.sha1(b''.join(current)).hexdigest()))
+            current, first = [], line_no + 1
+    if current:
+        blocks.append((first, current, hashlib.sha1(b''.join(current)).hexdigest()))
+    return blocks
+
+def _load_cache(cache_path, data):
+    """Прочитать кэш, если он соответствует текущему бинарнику"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('version') != CACHE_VERSION or cache.get('binary_sha1') != hashlib.sha1(data).hexdigest():
+        return None
+    return cache
+
+def assemble_incremental(input_path, output_path, cache_path=None):
+    """Пересобрать только измененные блоки и записать их в существующий бинарник"""
+    cache_path = cache_path or output_path + '.asmcache'
+    old_data = b''
+    if os.path.exists(output_path):
+        with open(output_path, 'rb') as f:
+            old_data = f.read()
+    cache = _load_cache(cache_path, old_data) if old_data else None
+
+    # Хэш блока -> (смещение, длина) в старом бинарнике
+    old_blocks = {}
+    if cache:
+        offset = 0
+        for block_hash, size in cache['blocks']:
+            old_blocks.setdefault(block_hash, (offset, size))
+            offset += size
+
+    with open(input_path, 'rb') as f:
+        blocks = split_blocks(f)
+
+    stats = {'blocks': len(blocks), 'encoded': 0, 'written': 0}
+    layout = []
+    digest = hashlib.sha1()
+    mode = 'r+b' if cache else 'wb'
+    with open(output_path, mode) as out:
+        offset = 0
+        for first, lines, block_hash in blocks:
+            if block_hash in old_blocks:
+                old_offset, size = old_blocks[block_hash]
+                data = old_data[old_offset:old_offset + size]
+                unchanged = old_offset == offset
+            else:
+                data = _encode_lines([line.decode() for line in lines], first)
+                stats['encoded'] += 1
+                unchanged = False
+            # Блок на прежнем месте не перезаписываем
+            if not unchanged:
+                out.seek(offset)
+                out.write(data)
+                stats['written'] += len(data)
+            digest.update(data)
+            layout.append([block_hash, len(data)])
+            offset += len(data)
+        out.truncate(offset)
+
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'binary_sha1': digest.hexdigest(), 'blocks': layout}, f)
+    return stats
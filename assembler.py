@@ -1,57 +1,203 @@
+import os
 import sys
 import struct
 import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Поля команд: мнемоника -> (код операции, ((поле, сдвиг, маска), ...))
+FIELDS = {
+    'LOAD': (15, (('b', 5, 0x1F),            # Биты 5-9
+                  ('c', 10, 0x1FFFFF))),     # Биты 10-30
+    'READ': (17, (('b', 5, 0x1FFF),          # Биты 5-17
+                  ('c', 18, 0x1F),           # Биты 18-22
+                  ('d', 23, 0x1F))),         # Биты 23-27
+    'WRITE': (8, (('b', 5, 0x1F),            # Биты 5-9
+                  ('c', 10, 0x7FFFFFF))),    # Биты 10-36
+    'BITREV': (25, (('b', 5, 0x1F),          # Биты 5-9
+                    ('c', 10, 0x1F))),       # Биты 10-14
+}
+
+# Порядок полей в операндах исходного текста
+OPERANDS = {
+    'LOAD': 'bc',
+    'READ': 'dcb',
+    'WRITE': 'bc',
+    'BITREV': 'bc',
+}
+
+# Для каждой мнемоники: (номер операнда, сдвиг, маска) в порядке исходного текста
+LAYOUT = {
+    cmd: tuple((OPERANDS[cmd].index(name), shift, mask) for name, shift, mask in fields)
+    for cmd, (opcode, fields) in FIELDS.items()
+}
+
+# Размер блока, после которого потоковая запись сбрасывает буфер
+FLUSH_SIZE = 1 << 16
+
+WORD = struct.Struct('<IB')
+
+def parse_int(token):
+    """Число в десятичной, шестнадцатеричной (0x), двоичной (0b) или восьмеричной (0o) записи"""
+    try:
+        return int(token)
+    except ValueError:
+        return int(token, 0)
+
+def _make_encoder(opcode, fields):
+    """Функция кодирования операндов одной мнемоники по таблице полей"""
+    fields = tuple((index + 1, shift, mask) for index, shift, mask in fields)
+
+    def encode(p):
+        raw = opcode
+        for index, shift, mask in fields:
+            raw |= (parse_int(p[index]) & mask) << shift
+        return raw
+    return encode
+
+# Мнемоника -> (число операндов, функция кодирования)
+ENCODING = {
+    cmd: (len(LAYOUT[cmd]), _make_encoder(FIELDS[cmd][0], LAYOUT[cmd]))
+    for cmd in FIELDS
+}
+
+def encode_line(line, line_no=0):
+    """Закодировать строку исходника в 32+ битное слово; None для пустых строк и комментариев"""
+    if ';' in line:
+        line = line[:line.index(';')]
+    p = line.replace(',', ' ').split()
+    if not p:
+        return None
+
+    try:
+        count, encoder = ENCODING[p[0].upper()]
+    except KeyError:
+        raise ValueError(f"строка {line_no}: неизвестная команда {p[0]}") from None
+    if len(p) - 1 != count:
+        raise ValueError(f"строка {line_no}: {p[0].upper()} ожидает {count} операнда")
+    try:
+        return encoder(p)
+    except ValueError:
+        raise ValueError(f"строка {line_no}: неверный операнд в '{line.strip()}'") from None
+
+def _encode_lines(lines, first_line=1):
+    """Закодировать строки в непрерывный блок байт"""
+    out = bytearray()
+    pack = WORD.pack
+    for line_no, line in enumerate(lines, first_line):
+        raw = encode_line(line, line_no)
+        if raw is not None:
+            out += pack(raw & 0xFFFFFFFF, raw >> 32)
+    return bytes(out)
+
+def _encode_chunk(args):
+    lines, first_line = args
+    return _encode_lines(lines, first_line)
+
+def _chunks(lines, chunk_lines):
+    """Разбить строки на блоки вместе с номером первой строки"""
+    chunk = []
+    first = 1
+    for line_no, line in enumerate(lines, 1):
+        chunk.append(line)
+        if len(chunk) >= chunk_lines:
+            yield chunk, first
+            chunk, first = [], line_no + 1
+    if chunk:
+        yield chunk, first
+
+def _lines(source):
+    return source.splitlines() if isinstance(source, str) else source
+
+def assemble(source):
+    """Собрать программу из текста или итерируемого набора строк"""
+    return _encode_lines(_lines(source))
+
+def assemble_stream(source, out, block_size=FLUSH_SIZE):
+    """Собрать программу, записывая слова в файловый объект блоками; вернуть число байт"""
+    buffer = bytearray()
+    written = 0
+    pack = WORD.pack
+    for line_no, line in enumerate(_lines(source), 1):
+        raw = encode_line(line, line_no)
+        if raw is None:
+            continue
+        buffer += pack(raw & 0xFFFFFFFF, raw >> 32)
+        if len(buffer) >= block_size:
+            out.write(buffer)
+            written += len(buffer)
+            buffer.clear()
+    out.write(buffer)
+    return written + len(buffer)
+
+def assemble_parallel(source, out, workers=None, chunk_lines=100000):
+    """Собрать программу в нескольких процессах; блоки записываются по порядку"""
+    written = 0
+    workers = workers or os.cpu_count() or 1
+    # Ограничиваем число блоков в работе, чтобы не держать весь исходник в памяти
+    window = 2 * workers
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in _chunks(_lines(source), chunk_lines):
+            pending.append(pool.submit(_encode_chunk, chunk))
+            if len(pending) >= window:
+                data = pending.popleft().result()
+                out.write(data)
+                written += len(data)
+        while pending:
+            data = pending.popleft().result()
+            out.write(data)
+            written += len(data)
+    return written
+
+# Код операции -> мнемоника, для дизассемблера
+MNEMONICS = {opcode: cmd for cmd, (opcode, fields) in FIELDS.items()}
+
+def disassemble_word(val):
+    """Восстановить строку исходника по закодированному слову"""
+    try:
+        cmd = MNEMONICS[val & 0x1F]
+    except KeyError:
+        raise ValueError(f"неизвестный код операции {val & 0x1F}") from None
+    values = {name: (val >> shift) & mask for name, shift, mask in FIELDS[cmd][1]}
+    return ' '.join([cmd] + [str(values[name]) for name in OPERANDS[cmd]])
+
+def disassemble(code):
+    """Дизассемблировать бинарник в список строк"""
+    return [disassemble_word(lo | hi << 32)
+            for lo, hi in WORD.iter_unpack(code[:len(code) - len(code) % 5])]
+
+def verify(code):
+    """Проверить бинарник круговым преобразованием: дизассемблер -> ассемблер"""
+    return assemble(disassemble(code)) == code
 
 class Assembler:
     def encode(self, a, b, c, d=0, mode=''):
         val = 0
-        if mode == 'LOAD':
-            val |= (a & 0x1F)          # Биты 0-4
-            val |= (b & 0x1F) << 5     # Биты 5-9
-            val |= (c & 0x1FFFFF) << 10 # Биты 10-30
-        elif mode == 'READ':
-            val |= (a & 0x1F)          # Биты 0-4
-            val |= (b & 0x1FFF) << 5    # Биты 5-17
-            val |= (c & 0x1F) << 18    # Биты 18-22
-            val |= (d & 0x1F) << 23    # Биты 23-27
-        elif mode == 'WRITE':
+        if mode in FIELDS:
+            values = {'b': b, 'c': c, 'd': d}
             val |= (a & 0x1F)          # Биты 0-4
-            val |= (b & 0x1F) << 5     # Биты 5-9
-            val |= (c & 0x7FFFFFF) << 10 # Биты 10-36
-        elif mode == 'BITREV':
-            val |= (a & 0x1F)          # Биты 0-4
-            val |= (b & 0x1F) << 5     # Биты 5-9
-            val |= (c & 0x1F) << 10    # Биты 10-14
+            for name, shift, mask in FIELDS[mode][1]:
+                val |= (values[name] & mask) << shift
         return val
 
-    def process(self, input_path, output_path, test_mode=False):
-        binary_data = bytearray()
-        with open(input_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith(';'): continue
-                p = line.replace(',', ' ').split()
-                cmd = p[0].upper()
-                
-                if cmd == 'LOAD':
-                    a, b, c = 15, int(p[1]), int(p[2])
-                    raw = self.encode(a, b, c, mode='LOAD')
-                elif cmd == 'READ':
-                    a, b, c, d = 17, int(p[3]), int(p[2]), int(p[1])
-                    raw = self.encode(a, b, c, d, mode='READ')
-                elif cmd == 'WRITE':
-                    a, b, c = 8, int(p[1]), int(p[2])
-                    raw = self.encode(a, b, c, mode='WRITE')
-                elif cmd == 'BITREV':
-                    a, b, c = 25, int(p[1]), int(p[2])
-                    raw = self.encode(a, b, c, mode='BITREV')
-
-                if test_mode:
-                    print(f"{cmd}: {hex(raw)} (bytes: {' '.join(f'{b:02x}' for b in raw.to_bytes(5, 'little'))})")
-                binary_data.extend(raw.to_bytes(5, 'little'))
+    def assemble(self, source):
+        return assemble(source)
 
-        with open(output_path, 'wb') as f:
-            f.write(binary_data)
+    def process(self, input_path, output_path, test_mode=False, workers=1):
+        with open(input_path, 'r') as src, open(output_path, 'wb') as out:
+            if test_mode:
+                for line_no, line in enumerate(src, 1):
+                    raw = encode_line(line, line_no)
+                    if raw is None:
+                        continue
+                    cmd = line.split()[0].upper()
+                    print(f"{cmd}: {hex(raw)} (bytes: {' '.join(f'{b:02x}' for b in raw.to_bytes(5, 'little'))})")
+                    out.write(raw.to_bytes(5, 'little'))
+            elif workers > 1:
+                assemble_parallel(src, out, workers)
+            else:
+                assemble_stream(src, out)
         print(f"Бинарный файл готов: {output_path}")
 
 if __name__ == "__main__":
@@ -59,5 +205,31 @@ if __name__ == "__main__":
     parser.add_argument("input")
     parser.add_argument("output")
     parser.add_argument("--test", action="store_true")
+    parser.add_argument("--workers", type=int, default=1, help="Число процессов для сборки")
+    parser.add_argument("--incremental", action="store_true", help="Пересобрать только измененные блоки")
+    parser.add_argument("--verify", action="store_true", help="Проверить результат дизассемблированием")
+    parser.add_argument("--disassemble", action="store_true", help="Дизассемблировать input (бинарник) в output")
     args = parser.parse_args()
-    Assembler().process(args.input, args.output, args.test)
+    try:
+        if args.disassemble:
+            with open(args.input, 'rb') as f:
+                lines = disassemble(f.read())
+            with open(args.output, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            print(f"Исходник восстановлен: {args.output}")
+            sys.exit(0)
+        if args.incremental:
+            import asm_cache
+            stats = asm_cache.assemble_incremental(args.input, args.output)
+            print(f"Блоков: {stats['blocks']}, пересобрано: {stats['encoded']}, записано байт: {stats['written']}")
+        else:
+            Assembler().process(args.input, args.output, args.test, args.workers)
+        if args.verify:
+            with open(args.output, 'rb') as f:
+                if not verify(f.read()):
+                    print("Ошибка: бинарник не совпадает с дизассемблированным исходником")
+                    sys.exit(1)
+            print("Проверка пройдена")
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
@@ -0,0 +1,119 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from manifest_cache import add_cache_arguments, cache_from_args
+from rust_deps_visualizer import CargoAnalyzer
+
+def parse_job(line, line_no):
+    """Задание из строки: JSON-объект или "пакет URL [версия]"; None для пустых строк"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        try:
+            data = json.loads(line)
+            return {'package': data['package'], 'repo_url': data['repo_url'],
+                    'version': data.get('version', 'latest')}
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"строка {line_no}: неверное задание ({e})")
+    parts = line.split()
+    if len(parts) not in (2, 3):
+        raise ValueError(f"строка {line_no}: ожидается 'пакет URL [версия]'")
+    return {'package': parts[0], 'repo_url': parts[1], 'version': parts[2] if len(parts) == 3 else 'latest'}
+
+def run_job(analyzer, job, max_depth, with_graph):
+    t0 = time.perf_counter()
+    graph, _, stats = analyzer.resolve(job['package'], job['repo_url'], job['version'],
+                                       max_depth, verbose=False)
+    result = dict(job)
+    root = graph.ids[job['package']]
+    if not graph.resolved[root]:
+        result.update(ok=False, error='не удалось получить Cargo.toml')
+    else:
+        result.update(
+            ok=True,
+            crate_version=graph.versions[root],
+            dependencies=[graph.names[dst] for dst in graph.successors(root)],
+            nodes=len(graph),
+            edges=len(graph.edge_src),
+            stats=stats,
+        )
+        if with_graph:
+            result['graph'] = graph.to_dict()
+    result['seconds'] = round(time.perf_counter() - t0, 4)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Пакетный анализ зависимостей Rust')
+    parser.add_argument('input', nargs='?', default='-', help='Файл заданий (JSONL или "пакет URL [версия]"), - для stdin')
+    parser.add_argument('--output', help='Файл JSONL для результатов (по умолчанию stdout)')
+    parser.add_argument('--max-depth', type=int, default=3, help='Глубина анализа')
+    parser.add_argument('--jobs', type=int, default=4, help='Число одновременно анализируемых пакетов')
+    parser.add_argument('--concurrency', type=int, default=8, help='Число одновременных загрузок')
+    parser.add_argument('--per-host', type=int, default=4, help='Число одновременных загрузок с одного хоста')
+    parser.add_argument('--raw-base', default='https://raw.githubusercontent.com', help='Сервер raw-файлов')
+    parser.add_argument('--graph', action='store_true', help='Включать в результат весь граф')
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    if args.max_depth < 0 or args.jobs <= 0:
+        print("Ошибка: неверная глубина или число заданий")
+        sys.exit(1)
+
+    try:
+        source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+
+    cache = cache_from_args(args)
+    # Один анализатор на все задания: общие сессия, пул загрузок, кэш и уже разобранные пакеты
+    analyzer = CargoAnalyzer(args.concurrency, args.per_host, args.raw_base, cache=cache, shared=True)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    # Сообщения об ошибках загрузки идут в stderr, чтобы не портить JSONL
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    counts = {'ok': 0, 'failed': 0}
+    t0 = time.perf_counter()
+
+    def emit(result):
+        counts['ok' if result.get('ok') else 'failed'] += 1
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+
+    with source, ThreadPoolExecutor(args.jobs) as jobs:
+        pending = set()
+        for line_no, line in enumerate(source, 1):
+            try:
+                job = parse_job(line, line_no)
+            except ValueError as e:
+                emit({'ok': False, 'error': str(e)})
+                continue
+            if job is None:
+                continue
+            pending.add(jobs.submit(run_job, analyzer, job, args.max_depth, args.graph))
+            # Готовые результаты выводятся, не дожидаясь конца входа
+            done, pending = wait(pending, timeout=0, return_when=FIRST_COMPLETED)
+            for future in done:
+                emit(future.result())
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                emit(future.result())
+
+    analyzer.close()
+    sys.stdout = stdout
+    if out is not stdout:
+        out.close()
+    if cache is not None:
+        cache.save()
+    summary = f"Заданий: {counts['ok'] + counts['failed']}, ошибок: {counts['failed']}, " \
+              f"время: {time.perf_counter() - t0:.2f} с"
+    if cache is not None:
+        summary += '\n' + cache.report()
+    print(summary, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import random
+import timeit
+from array import array
+
+import bitrev
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарк реализаций BITREV')
+    parser.add_argument('--count', type=int, default=100000, help='Количество слов')
+    parser.add_argument('--repeat', type=int, default=5, help='Число повторов')
+    args = parser.parse_args()
+
+    random.seed(0)
+    values = array('I', (random.getrandbits(32) for _ in range(args.count)))
+
+    cases = [
+        ('строка (исходная)', lambda: [bitrev.bitrev32_string(x) for x in values]),
+        ('таблица 16 бит', lambda: [bitrev.bitrev32(x) for x in values]),
+        ('сдвиги и маски', lambda: [bitrev.bitrev32_swap(x) for x in values]),
+        ('bitrev_array', lambda: bitrev.bitrev_array(values)),
+    ]
+    if bitrev.np is not None:
+        np_values = bitrev.np.frombuffer(values, dtype=bitrev.np.uint32)
+        cases.append(('numpy', lambda: bitrev.bitrev_numpy(np_values)))
+    else:
+        print("numpy не установлен, векторный путь пропущен")
+
+    # Проверяем, что все реализации дают одинаковый результат
+    expected = [bitrev.bitrev32_string(x) for x in values]
+    for name, func in cases:
+        if [int(x) for x in func()] != expected:
+            print(f"Ошибка: {name} дает неверный результат")
+            return
+
+    base = None
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        base = base or best
+        print(f"{name:20} {args.count / best / 1e6:8.2f} млн слов/с  x{base / best:.1f}")
+
+if __name__ == "__main__":
+    main()
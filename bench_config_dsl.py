@@ -0,0 +1,124 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import lark
+
+from bench_vm import git_revision, peak_rss_kb
+from config_dsl import get_parser, parse_config
+
+MODES = {'tree': False, 'inline': True}
+
+def generate(size, seed=0):
+    """Конфигурация DSL не меньше size байт: константы и таблицы со всеми видами значений"""
+    rnd = random.Random(seed)
+
+    def num():
+        return '0b' + bin(rnd.randrange(1, 1 << 12))[2:]
+
+    parts = []
+    total = 0
+    constants = []
+    while total < size:
+        if not constants or rnd.random() < 0.2:
+            name = f'c{len(constants)}'
+            part = f'{name} := {num()};\n'
+            constants.append(name)
+        else:
+            pairs = []
+            for j in range(rnd.randrange(4, 16)):
+                kind = rnd.randrange(5)
+                if kind == 0:
+                    value = num()
+                elif kind == 1:
+                    value = rnd.choice(constants)
+                elif kind == 2:
+                    value = '({' + ', '.join(num() for _ in range(rnd.randrange(1, 6))) + '})'
+                elif kind == 3:
+                    value = f'#[+ {num()} {rnd.choice(constants)}]'
+                else:
+                    value = f'#[pow({num()} 0b10)]'
+                pairs.append(f'    k{len(parts)}_{j} => {value}')
+            part = 'table(\n' + ',\n'.join(pairs) + '\n)\n'
+        parts.append(part)
+        total += len(part)
+    return ''.join(parts)
+
+def measure(text, inline, repeats):
+    """Лучшее время из repeats прогонов и пиковая память Python (отдельный прогон под tracemalloc)"""
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = parse_config(text, inline)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+        del result
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    result = parse_config(text, inline)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return result, {
+        'seconds': round(best, 4),
+        'bytes_per_sec': round(len(text) / best),
+        'peak_traced_kb': peak // 1024,
+    }
+
+def run_benchmark(args):
+    get_parser(inline=False)
+    get_parser(inline=True)
+    sizes = []
+    for size in args.sizes:
+        text = generate(int(size * 1024 * 1024), args.seed)
+        results = {}
+        entry = {'bytes': len(text), 'modes': {}}
+        for mode, inline in MODES.items():
+            results[mode], entry['modes'][mode] = measure(text, inline, args.repeats)
+        if results['tree'] != results['inline']:
+            print(f"Ошибка: результаты режимов различаются на входе {len(text)} байт")
+            sys.exit(1)
+        tree, inline = entry['modes']['tree'], entry['modes']['inline']
+        entry['speedup'] = round(tree['seconds'] / inline['seconds'], 2)
+        entry['memory_ratio'] = round(tree['peak_traced_kb'] / max(1, inline['peak_traced_kb']), 2)
+        sizes.append(entry)
+        del results, text
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'lark': lark.__version__,
+        'params': {'sizes_mb': args.sizes, 'repeats': args.repeats, 'seed': args.seed},
+        'sizes': sizes,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк преобразования DSL: дерево разбора против преобразования при разборе')
+    parser.add_argument('--sizes', default='0.25,1', help='Размеры входа в МБ через запятую')
+    parser.add_argument('--repeats', type=int, default=3, help='Прогонов на замер времени')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Файл для JSON (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    try:
+        args.sizes = [float(size) for size in args.sizes.split(',')]
+    except ValueError:
+        print("Ошибка: неверный список размеров")
+        sys.exit(1)
+    if args.repeats <= 0 or any(size <= 0 for size in args.sizes):
+        print("Ошибка: неверные параметры")
+        sys.exit(1)
+
+    result = run_benchmark(args)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
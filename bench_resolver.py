@@ -0,0 +1,227 @@
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from bench_vm import git_revision, peak_rss_kb
+from manifest_cache import ManifestCache
+from rust_deps_visualizer import CargoAnalyzer
+
+OWNER = 'rust-lang'
+BRANCH = 'main'
+
+def generate(nodes, fanout, depth, shared, seed=0):
+    """Синтетический граф крейтов по уровням: {имя: [зависимости]}.
+
+    nodes крейтов делятся между depth уровнями (размер уровня растет в
+    fanout * (1 - shared) раз). Каждый крейт получает fanout зависимостей на
+    следующем уровне: с вероятностью shared - уже использованный крейт
+    уровня, иначе - еще не использованный. Крейты, которым не хватило
+    родителей, добавляются случайным крейтам. Циклов нет.
+    """
+    rnd = random.Random(seed)
+    ratio = max(1.0, fanout * (1 - shared))
+    weights = [ratio ** k for k in range(1, depth + 1)]
+    sizes = []
+    remaining = nodes - 1
+    for k in range(depth):
+        size = min(remaining, max(1, round(remaining * weights[k] / sum(weights[k:]))))
+        sizes.append(size)
+        remaining -= size
+
+    graph = {'crate0': []}
+    level = ['crate0']
+    for size in sizes:
+        if size <= 0:
+            break
+        names = [f'crate{len(graph) + i}' for i in range(size)]
+        for name in names:
+            graph[name] = []
+        used = 0
+        for parent in level:
+            deps = graph[parent]
+            for _ in range(fanout):
+                if used and (used == size or rnd.random() < shared):
+                    dep = names[rnd.randrange(used)]
+                else:
+                    dep = names[used]
+                    used += 1
+                if dep not in deps:
+                    deps.append(dep)
+        for name in names[used:]:
+            graph[rnd.choice(level)].append(name)
+        level = names
+    return graph
+
+def manifest_files(graph):
+    """Cargo.toml по путям raw-сервера: /<owner>/<repo>/<ветка>/Cargo.toml"""
+    files = {}
+    for name, deps in graph.items():
+        lines = ['[package]', f'name = "{name}"', 'version = "0.1.0"', '', '[dependencies]']
+        lines.extend(f'{dep} = "0.1"' for dep in deps)
+        files[f'/{OWNER}/{name}/{BRANCH}/Cargo.toml'] = ('\n'.join(lines) + '\n').encode('utf-8')
+    return files
+
+class FakeRawServer:
+    """Локальный сервер в формате raw.githubusercontent.com с задержкой и ETag"""
+
+    def __init__(self, files, latency=0.0):
+        self.files = files
+        self.latency = latency
+        self.counts = {'requests': 0, 'not_modified': 0, 'not_found': 0}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.files.get(self.path)
+                etag = None if body is None else '"' + hashlib.sha1(body).hexdigest() + '"'
+                with server._lock:
+                    server.counts['requests'] += 1
+                    if body is None:
+                        server.counts['not_found'] += 1
+                    elif self.headers.get('If-None-Match') == etag:
+                        server.counts['not_modified'] += 1
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                elif self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                else:
+                    self.send_response(200)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(http.server.ThreadingHTTPServer):
+            # Очередь по умолчанию (5) меньше числа одновременных загрузок
+            request_queue_size = 128
+            daemon_threads = True
+
+        self.httpd = Server(('127.0.0.1', 0), Handler)
+        self.base = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(self.counts, 0)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def run_once(server, args, cache):
+    """Один прогон CargoAnalyzer: время, запросы, попадания в кэш, память"""
+    server.reset()
+    analyzer = CargoAnalyzer(args.concurrency, args.per_host, server.base, cache=cache)
+    if args.tracemalloc:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    graph, _, _ = analyzer.resolve('crate0', f'https://github.com/{OWNER}/crate0', 'latest',
+                                   args.depth, verbose=False)
+    wall = time.perf_counter() - t0
+    result = {
+        'wall_seconds': wall,
+        'nodes': len(graph),
+        'edges': len(graph.edge_src),
+        'requests': server.counts['requests'],
+        'not_modified': server.counts['not_modified'],
+    }
+    if args.tracemalloc:
+        result['peak_traced_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    analyzer.close()
+    if cache is not None:
+        cache.save()
+        stats = dict(cache.stats)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidated']
+        result['cache'] = stats
+        result['cache_hit_rate'] = stats['hits'] / lookups if lookups else None
+        for key in cache.stats:
+            cache.stats[key] = 0
+    return result
+
+def run_benchmark(args):
+    graph = generate(args.nodes, args.fanout, args.depth, args.shared, args.seed)
+    server = FakeRawServer(manifest_files(graph), args.latency)
+    cache_dir = tempfile.mkdtemp(prefix='bench_resolver_')
+    runs = {}
+    try:
+        # Без кэша, холодный кэш, теплый кэш и кэш с истекшим TTL (проверка через 304)
+        runs['no_cache'] = run_once(server, args, None)
+        runs['cold_cache'] = run_once(server, args, ManifestCache(cache_dir, ttl=3600))
+        runs['warm_cache'] = run_once(server, args, ManifestCache(cache_dir, ttl=3600))
+        runs['revalidate'] = run_once(server, args, ManifestCache(cache_dir, ttl=0))
+    finally:
+        server.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'params': {
+            'nodes': args.nodes, 'fanout': args.fanout, 'depth': args.depth, 'shared': args.shared,
+            'seed': args.seed, 'latency': args.latency, 'concurrency': args.concurrency,
+            'per_host': args.per_host,
+        },
+        'graph': {'crates': len(graph), 'edges': sum(len(deps) for deps in graph.values())},
+        'runs': runs,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк загрузки графа зависимостей на синтетических крейтах')
+    parser.add_argument('--nodes', type=int, default=1000, help='Число крейтов')
+    parser.add_argument('--fanout', type=int, default=5, help='Зависимостей у крейта')
+    parser.add_argument('--depth', type=int, default=4, help='Глубина графа и анализа')
+    parser.add_argument('--shared', type=float, default=0.5, help='Доля общих зависимостей (0..1)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.01, help='Задержка ответа сервера, с')
+    parser.add_argument('--concurrency', type=int, default=8, help='Число одновременных загрузок')
+    parser.add_argument('--per-host', type=int, default=8, help='Число одновременных загрузок с одного хоста')
+    parser.add_argument('--tracemalloc', action='store_true', help='Пиковая память Python на каждый прогон (медленнее)')
+    parser.add_argument('--output', help='Файл для JSON (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    if args.nodes <= 0 or args.fanout <= 0 or args.depth <= 0 or not 0 <= args.shared <= 1:
+        print("Ошибка: неверные параметры графа")
+        sys.exit(1)
+
+    # Сообщения анализатора в отчет не попадают
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        result = run_benchmark(args)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from assembler import Assembler
+from interpreter import VM
+
+# Готовые наборы долей команд
+MIXES = {
+    'uniform': {'LOAD': 1, 'READ': 1, 'WRITE': 1, 'BITREV': 1},
+    'load': {'LOAD': 7, 'READ': 1, 'WRITE': 1, 'BITREV': 1},
+    'read': {'LOAD': 2, 'READ': 6, 'WRITE': 1, 'BITREV': 1},
+    'write': {'LOAD': 2, 'READ': 1, 'WRITE': 6, 'BITREV': 1},
+    'bitrev': {'LOAD': 2, 'READ': 1, 'WRITE': 1, 'BITREV': 6},
+}
+
+def parse_mix(text):
+    """Набор по имени или в виде LOAD=3,READ=1,..."""
+    if text in MIXES:
+        return MIXES[text]
+    mix = {}
+    for part in text.split(','):
+        name, weight = part.split('=')
+        mix[name.strip().upper()] = float(weight)
+    return mix
+
+def generate(size, mix, addr_space, seed=0):
+    """Сгенерировать синтетическую программу: список строк исходника"""
+    rnd = random.Random(seed)
+    names = list(mix)
+    kinds = rnd.choices(names, weights=[mix[n] for n in names], k=size)
+    lines = []
+    for kind in kinds:
+        if kind == 'LOAD':
+            lines.append(f"LOAD {rnd.randrange(32)} {rnd.randrange(min(addr_space, 1 << 21))}")
+        elif kind == 'READ':
+            lines.append(f"READ {rnd.randrange(32)} {rnd.randrange(32)} {rnd.randrange(1 << 13)}")
+        elif kind == 'WRITE':
+            lines.append(f"WRITE {rnd.randrange(32)} {rnd.randrange(addr_space)}")
+        else:
+            lines.append(f"BITREV {rnd.randrange(32)} {rnd.randrange(32)}")
+    return lines
+
+def peak_rss_kb():
+    """Пиковый объем памяти процесса в КБ (если доступно)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # На macOS ru_maxrss в байтах
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def run_benchmark(args):
+    mix = parse_mix(args.mix)
+    lines = generate(args.size, mix, args.addr_space, args.seed)
+
+    t0 = time.perf_counter()
+    code = Assembler().assemble(lines)
+    assemble_time = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_path = os.path.join(tmp, 'program.bin')
+        dump_path = os.path.join(tmp, 'dump.' + args.format)
+        with open(bin_path, 'wb') as f:
+            f.write(code)
+
+        vm = VM(args.addr_space, args.memory, args.translate)
+        t0 = time.perf_counter()
+        vm.load(bin_path)
+        load_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        count = vm.execute()
+        execute_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        vm.dump(dump_path, f"0-{args.addr_space - 1}", args.format, args.sparse)
+        dump_time = time.perf_counter() - t0
+
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'params': {
+            'size': args.size, 'mix': mix, 'seed': args.seed, 'addr_space': args.addr_space,
+            'memory': args.memory, 'translate': args.translate, 'format': args.format, 'sparse': args.sparse,
+        },
+        'assemble_seconds': assemble_time,
+        'assemble_lines_per_sec': args.size / assemble_time,
+        'load_seconds': load_time,
+        'execute_seconds': execute_time,
+        'instructions_per_sec': count / execute_time if execute_time > 0 else None,
+        'dump_seconds': dump_time,
+        'vm_memory_bytes': vm.memory.footprint(),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк ассемблера и интерпретатора')
+    parser.add_argument('--size', type=int, default=100000, help='Число команд в программе')
+    parser.add_argument('--mix', default='uniform', help=f"Доли команд: {', '.join(MIXES)} или LOAD=3,READ=1,...")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--addr-space', type=int, default=1 << 16, help='Размер памяти VM и диапазон адресов')
+    parser.add_argument('--memory', choices=['auto', 'dense', 'paged'], default='auto')
+    parser.add_argument('--translate', action='store_true', help='Режим трансляции в Python-код')
+    parser.add_argument('--format', choices=['csv', 'bin', 'npy'], default='csv', help='Формат дампа')
+    parser.add_argument('--sparse', action='store_true', help='Дамп только ненулевых ячеек')
+    parser.add_argument('--output', help='Файл для JSON (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    # Сообщения VM о сохранении дампа в отчет не попадают
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        result = run_benchmark(args)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
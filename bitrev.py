@@ -0,0 +1,43 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Перевернутые байты и 16-битные половины слова
+REV8 = [int('{:08b}'.format(i)[::-1], 2) for i in range(256)]
+REV16 = [(REV8[i & 0xFF] << 8) | REV8[i >> 8] for i in range(1 << 16)]
+
+def bitrev32_string(x):
+    """Исходная реализация через строку (для сравнения)"""
+    return int('{:032b}'.format(x & 0xFFFFFFFF)[::-1], 2)
+
+def bitrev32(x):
+    """Bit reverse 32-битного слова через таблицу 16-битных половин"""
+    x &= 0xFFFFFFFF
+    return (REV16[x & 0xFFFF] << 16) | REV16[x >> 16]
+
+def bitrev32_swap(x):
+    """Bit reverse 32-битного слова сетью сдвигов и масок"""
+    x &= 0xFFFFFFFF
+    x = ((x >> 1) & 0x55555555) | ((x & 0x55555555) << 1)
+    x = ((x >> 2) & 0x33333333) | ((x & 0x33333333) << 2)
+    x = ((x >> 4) & 0x0F0F0F0F) | ((x & 0x0F0F0F0F) << 4)
+    x = ((x >> 8) & 0x00FF00FF) | ((x & 0x00FF00FF) << 8)
+    return ((x >> 16) | (x << 16)) & 0xFFFFFFFF
+
+def bitrev_numpy(values):
+    """Векторный bit reverse массива uint32 (нужен numpy)"""
+    x = np.asarray(values, dtype=np.uint32)
+    x = ((x >> 1) & 0x55555555) | ((x & 0x55555555) << 1)
+    x = ((x >> 2) & 0x33333333) | ((x & 0x33333333) << 2)
+    x = ((x >> 4) & 0x0F0F0F0F) | ((x & 0x0F0F0F0F) << 4)
+    x = ((x >> 8) & 0x00FF00FF) | ((x & 0x00FF00FF) << 8)
+    return (x >> 16) | (x << 16)
+
+def bitrev_array(values):
+    """Bit reverse массива слов, возвращает array('I')"""
+    if np is not None:
+        return array('I', bitrev_numpy(values).astype(np.uint32).tobytes())
+    return array('I', map(bitrev32, values))
@@ -4,24 +4,22 @@ import os
 import requests
 import json
 
-def get_cargo_toml_from_github(repo_url, package, version):
+from cargo_manifest import parse_manifest
+from manifest_cache import add_cache_arguments, cache_from_args, cargo_toml_url
+
+def get_cargo_toml_from_github(repo_url, package, version, cache=None):
     """Получить Cargo.toml из GitHub репозитория"""
     try:
-        # Преобразуем URL в raw-формат
-        if 'github.com' in repo_url:
-            # Меняем обычный URL на raw.githubusercontent.com
-            raw_url = repo_url.replace('github.com', 'raw.githubusercontent.com')
-            if raw_url.endswith('.git'):
-                raw_url = raw_url[:-4]
-            
-            # Для версии используем ветку или тег
-            branch = version if version != 'latest' else 'main'
-            cargo_url = f"{raw_url}/{branch}/Cargo.toml"
-        else:
+        # Преобразуем URL в raw-формат (raw.githubusercontent.com, ветка или тег)
+        cargo_url = cargo_toml_url(repo_url, version)
+        if cargo_url is None:
             print(f"Ошибка: неподдерживаемый репозиторий {repo_url}")
             return None
         
         print(f"Загружаем Cargo.toml из: {cargo_url}")
+        if cache is not None:
+            return cache.get(repo_url, version, cargo_url,
+                             lambda url, headers: requests.get(url, headers=headers))
         response = requests.get(cargo_url)
         
         if response.status_code == 200:
@@ -35,38 +33,12 @@ def get_cargo_toml_from_github(repo_url, package, version):
         return None
 
 def parse_cargo_toml(content):
-    """Парсим зависимости из Cargo.toml"""
-    dependencies = []
-    
+    """Парсим зависимости из Cargo.toml (обычные и платформенные)"""
     try:
-        lines = content.split('\n')
-        in_dependencies_section = False
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Находим секцию зависимостей
-            if line == '[dependencies]':
-                in_dependencies_section = True
-                continue
-            elif line.startswith('[') and in_dependencies_section:
-                # Конец секции зависимостей
-                break
-            
-            # Парсим зависимости в секции
-            if in_dependencies_section and line and not line.startswith('#'):
-                # Убираем комментарии
-                line = line.split('#')[0].strip()
-                if line:
-                    # Берем имя пакета до первого пробела или =
-                    dep_name = line.split('=')[0].strip()
-                    if dep_name:
-                        dependencies.append(dep_name)
-                        
-    except Exception as e:
+        return parse_manifest(content).dependency_names()
+    except ValueError as e:
         print(f"Ошибка парсинга Cargo.toml: {e}")
-    
-    return dependencies
+        return []
 
 def main():
     parser = argparse.ArgumentParser(description='Анализатор зависимостей Rust')
@@ -76,6 +48,7 @@ def main():
     parser.add_argument('--repo-url', required=True, help='URL репозитория')
     parser.add_argument('--version', default='latest', help='Версия пакета')
     parser.add_argument('--output', default='graph.png', help='Файл для графа')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
     
@@ -89,7 +62,11 @@ def main():
     print(f"Репозиторий: {args.repo_url}")
     
     # Получаем Cargo.toml
-    cargo_content = get_cargo_toml_from_github(args.repo_url, args.package, args.version)
+    cache = cache_from_args(args)
+    cargo_content = get_cargo_toml_from_github(args.repo_url, args.package, args.version, cache)
+    if cache is not None:
+        cache.save()
+        print(cache.report())
     
     if not cargo_content:
         print("Не удалось получить Cargo.toml")
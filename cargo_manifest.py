@@ -0,0 +1,223 @@
+import argparse
+import glob
+import hashlib
+import os
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+
+# Секции зависимостей Cargo.toml и их вид
+DEPENDENCY_TABLES = {
+    'dependencies': 'normal',
+    'dev-dependencies': 'dev',
+    'dev_dependencies': 'dev',
+    'build-dependencies': 'build',
+    'build_dependencies': 'build',
+}
+
+@dataclass(frozen=True)
+class Dependency:
+    name: str                    # ключ в таблице зависимостей
+    package: str                 # настоящее имя крейта (поле package = "...")
+    req: str | None = None       # требование к версии
+    kind: str = 'normal'         # normal, dev или build
+    target: str | None = None    # cfg(...) или triple для [target.*.dependencies]
+    optional: bool = False
+    path: str | None = None
+    git: str | None = None
+    workspace: bool = False      # зависимость унаследована из [workspace.dependencies]
+
+@dataclass
+class Workspace:
+    members: list = field(default_factory=list)
+    exclude: list = field(default_factory=list)
+    dependencies: list = field(default_factory=list)
+
+@dataclass
+class Manifest:
+    name: str | None             # None для виртуального манифеста (только [workspace])
+    version: str | None
+    dependencies: list = field(default_factory=list)
+    workspace: Workspace | None = None
+    path: str | None = None
+
+    def unique_dependencies(self, kinds=('normal',)):
+        """Зависимости нужных видов: по одной на крейт, без самого пакета"""
+        seen = set()
+        deps = []
+        for dep in self.dependencies:
+            if dep.kind in kinds and dep.package != self.name and dep.package not in seen:
+                seen.add(dep.package)
+                deps.append(dep)
+        return deps
+
+    def dependency_names(self, kinds=('normal',)):
+        """Имена крейтов-зависимостей нужных видов, без повторов и без самого пакета"""
+        return [dep.package for dep in self.unique_dependencies(kinds)]
+
+def _dependency(key, spec, kind, target):
+    if isinstance(spec, str):
+        return Dependency(key, key, spec, kind, target)
+    if not isinstance(spec, dict):
+        raise ValueError(f"неверное описание зависимости {key}")
+    req = spec.get('version')
+    return Dependency(
+        name=key,
+        package=spec.get('package', key),
+        req=req if isinstance(req, str) else None,
+        kind=kind,
+        target=target,
+        optional=bool(spec.get('optional', False)),
+        path=spec.get('path'),
+        git=spec.get('git'),
+        workspace=bool(spec.get('workspace', False)),
+    )
+
+def _table(value, name):
+    """Проверить, что раздел манифеста - таблица"""
+    if not isinstance(value, dict):
+        raise ValueError(f"раздел {name} должен быть таблицей")
+    return value
+
+def _array(value, name):
+    if not isinstance(value, list):
+        raise ValueError(f"{name} должен быть массивом")
+    return list(value)
+
+def _dependencies(table, target=None):
+    deps = []
+    for section, kind in DEPENDENCY_TABLES.items():
+        name = section if target is None else f"target.{target}.{section}"
+        for key, spec in _table(table.get(section, {}), name).items():
+            deps.append(_dependency(key, spec, kind, target))
+    return deps
+
+def _parse(content):
+    data = tomllib.loads(content)
+    package = _table(data.get('package', {}), 'package')
+    name = package.get('name')
+    version = package.get('version')
+
+    deps = _dependencies(data)
+    for target, table in _table(data.get('target', {}), 'target').items():
+        deps.extend(_dependencies(_table(table, f"target.{target}"), target))
+
+    workspace = None
+    if 'workspace' in data:
+        ws = _table(data['workspace'], 'workspace')
+        workspace = Workspace(
+            members=_array(ws.get('members', []), 'workspace.members'),
+            exclude=_array(ws.get('exclude', []), 'workspace.exclude'),
+            dependencies=[_dependency(key, spec, 'normal', None)
+                          for key, spec in _table(ws.get('dependencies', {}), 'workspace.dependencies').items()],
+        )
+
+    return Manifest(
+        name=name if isinstance(name, str) else None,
+        version=version if isinstance(version, str) else None,
+        dependencies=deps,
+        workspace=workspace,
+    )
+
+# Разобранные манифесты по хэшу содержимого
+_memo = {}
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def parse_manifest(content, digest=None):
+    """Разобрать Cargo.toml; повторный разбор того же содержимого берется из памяти.
+
+    Ошибки TOML поднимаются как ValueError (tomllib.TOMLDecodeError).
+    """
+    digest = digest or content_hash(content)
+    manifest = _memo.get(digest)
+    if manifest is None:
+        manifest = _memo[digest] = _parse(content)
+    return manifest
+
+def read_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return replace(parse_manifest(f.read()), path=path)
+
+def _parse_job(job):
+    digest, content = job
+    try:
+        return digest, _parse(content), None
+    except ValueError as e:
+        return digest, None, str(e)
+
+def workspace_member_paths(root, workspace):
+    """Пути к Cargo.toml членов workspace с раскрытием шаблонов и учетом exclude"""
+    excluded = set()
+    for pattern in workspace.exclude:
+        excluded.update(os.path.normpath(p) for p in glob.glob(os.path.join(root, pattern)))
+    paths = []
+    for pattern in workspace.members:
+        for directory in sorted(glob.glob(os.path.join(root, pattern))):
+            directory = os.path.normpath(directory)
+            manifest_path = os.path.join(directory, 'Cargo.toml')
+            if directory not in excluded and os.path.isfile(manifest_path) and manifest_path not in paths:
+                paths.append(manifest_path)
+    return paths
+
+def load_workspace(root, workers=None):
+    """Прочитать корневой манифест и все манифесты членов workspace за один проход.
+
+    Новые (не встречавшиеся по хэшу) манифесты разбираются в пуле процессов.
+    Возвращает (корневой манифест, список манифестов членов); члены с ошибками
+    разбора пропускаются с сообщением.
+    """
+    root_manifest = read_manifest(os.path.join(root, 'Cargo.toml'))
+    if root_manifest.workspace is None:
+        return root_manifest, []
+
+    paths = workspace_member_paths(root, root_manifest.workspace)
+    contents = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        contents.append((content_hash(content), content))
+
+    jobs = {digest: content for digest, content in contents if digest not in _memo}
+    workers = workers or os.cpu_count() or 1
+    errors = {}
+    if len(jobs) > 1 and workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            chunksize = max(1, len(jobs) // (4 * workers))
+            results = list(pool.map(_parse_job, jobs.items(), chunksize=chunksize))
+    else:
+        results = [_parse_job(job) for job in jobs.items()]
+    for digest, manifest, error in results:
+        if manifest is not None:
+            _memo[digest] = manifest
+        else:
+            errors[digest] = error
+
+    members = []
+    for path, (digest, _) in zip(paths, contents):
+        if digest in errors:
+            print(f"Ошибка разбора {path}: {errors[digest]}")
+        else:
+            members.append(replace(_memo[digest], path=path))
+    return root_manifest, members
+
+def main():
+    parser = argparse.ArgumentParser(description='Разбор Cargo.toml и workspace')
+    parser.add_argument('path', help='Каталог с Cargo.toml')
+    parser.add_argument('--workers', type=int, help='Число процессов')
+    args = parser.parse_args()
+
+    root, members = load_workspace(args.path, args.workers)
+    for manifest in [root] + members:
+        if manifest.name is None:
+            print(f"workspace: {len(members)} членов")
+            continue
+        kinds = {}
+        for dep in manifest.dependencies:
+            kinds[dep.kind] = kinds.get(dep.kind, 0) + 1
+        summary = ', '.join(f"{kind}: {count}" for kind, count in sorted(kinds.items()))
+        print(f"{manifest.name} {manifest.version or ''} ({summary or 'нет зависимостей'})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import lark
+import tomli_w
+
+# Таблицы LALR строятся один раз и сохраняются на диск (lark сверяет хэш грамматики и версии)
+PARSER_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'config_dsl')
+
+grammar = r"""
+%ignore /\s+/
+%ignore /\*[^\n]*/      // однострочные комментарии
+%ignore /\{-[^-]*-\}/   // многострочные комментарии
+
+NUM: /0[bB][01]+/
+NAME: /[_a-zA-Z][_a-zA-Z0-9]*/
+
+start: (const | table)*
+
+const: NAME ":=" value ";"
+
+table: "table" "(" [pair ("," pair)*] ")"
+pair: NAME "=>" value
+
+array: "(" "{" [value ("," value)*] "}" ")"
+
+prefixed: "#" "[" prefix "]"
+prefix: add | sub | mul | power
+
+add: "+" value value
+sub: "-" value value
+mul: "*" value value
+power: "pow" "(" value value ")"
+
+?value: table
+      | array
+      | prefixed
+      | NAME
+      | NUM
+"""
+
+class T(lark.Transformer):
+    def __init__(self):
+        super().__init__(visit_tokens=True)
+        self.constants = {}
+
+    def NAME(self, name):
+        return str(name)
+
+    def NUM(self, num):
+        val = num.value
+        if val.lower().startswith('0b'):
+            return int(val[2:], 2)
+        return int(val, 2)
+
+    def const(self, items):
+        name, val = items
+        self.constants[name] = val
+        return None
+
+    def table(self, items):
+        if not items:
+            return {}
+
+        result = {}
+        for key, value in items:
+            if isinstance(value, lark.Tree) and value.data == 'prefix':
+                value = value.children[0]
+
+            if isinstance(value, str) and value in self.constants:
+                result[key] = self.constants[value]
+            else:
+                result[key] = value
+        return result
+
+    def pair(self, items):
+        key, val = items
+        return (key, val)
+
+    def array(self, items):
+        if items is None:
+            return []
+
+        result = []
+        for item in items:
+            if isinstance(item, str) and item in self.constants:
+                result.append(self.constants[item])
+            else:
+                result.append(item)
+        return result
+
+    def add(self, items):
+        a, b = items
+        a = self.constants.get(a, a) if isinstance(a, str) else a
+        b = self.constants.get(b, b) if isinstance(b, str) else b
+        return a + b
+
+    def sub(self, items):
+        a, b = items
+        a = self.constants.get(a, a) if isinstance(a, str) else a
+        b = self.constants.get(b, b) if isinstance(b, str) else b
+        return a - b
+
+    def mul(self, items):
+        a, b = items
+        a = self.constants.get(a, a) if isinstance(a, str) else a
+        b = self.constants.get(b, b) if isinstance(b, str) else b
+        return a * b
+
+    def power(self, items):
+        a, b = items
+        a = self.constants.get(a, a) if isinstance(a, str) else a
+        b = self.constants.get(b, b) if isinstance(b, str) else b
+        return a ** b
+
+    def prefixed(self, items):
+        return items[0]
+
+    def start(self, items):
+        result = {}
+        for item in items:
+            if isinstance(item, dict):
+                result.update(item)
+        return result
+
+class InlineT(T):
+    """T для преобразования прямо во время разбора LALR, без дерева.
+
+    Обработчики терминалов lark вызывает в лексере, и они обязаны вернуть
+    токен, поэтому NAME и NUM преобразуются при свертке правил.
+    """
+    NAME = None
+    NUM = None
+
+    def _values(self, items):
+        values = []
+        for item in items:
+            if isinstance(item, lark.Token):
+                item = T.NUM(self, item) if item.type == 'NUM' else str(item)
+            values.append(item)
+        return values
+
+    def const(self, items):
+        return super().const(self._values(items))
+
+    def pair(self, items):
+        return super().pair(self._values(items))
+
+    def array(self, items):
+        return super().array(self._values(items))
+
+    def add(self, items):
+        return super().add(self._values(items))
+
+    def sub(self, items):
+        return super().sub(self._values(items))
+
+    def mul(self, items):
+        return super().mul(self._values(items))
+
+    def power(self, items):
+        return super().power(self._values(items))
+
+# Парсеры процесса: False - строит дерево, True - с InlineT
+_parsers = {}
+
+def get_parser(cache_dir=PARSER_CACHE_DIR, inline=False):
+    """Парсер LALR: один на процесс, таблицы из кэша на диске (None - без кэша)"""
+    parser = _parsers.get(inline)
+    if parser is None:
+        cache = False
+        if cache_dir is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                cache = os.path.join(cache_dir, f"lalr-{lark.__version__}.pickle")
+            except OSError:
+                pass
+        parser = lark.Lark(grammar, parser='lalr', cache=cache, transformer=InlineT() if inline else None)
+        _parsers[inline] = parser
+    return parser
+
+def parse_config(text, inline=True):
+    """Текст DSL -> словарь для TOML; inline - без дерева разбора (не для нескольких потоков)"""
+    if not inline:
+        return T().transform(get_parser().parse(text))
+    parser = get_parser(inline=True)
+    # Константы у каждого файла свои
+    parser.options.transformer.constants = {}
+    return parser.parse(text)
+
+def to_toml(text, inline=True):
+    return tomli_w.dumps(parse_config(text, inline))
+
+def dump_tree(tree, out=None):
+    """Отладочный вывод дерева разбора"""
+    print("Дерево парсинга:", file=out)
+    for subtree in tree.iter_subtrees():
+        indent = "▶ " * (subtree.meta.line - 1 if hasattr(subtree.meta, 'line') else 0)
+        print(f"{indent}{subtree.data}", file=out)
+        for child in subtree.children:
+            if isinstance(child, lark.Tree):
+                continue
+            print(f"{indent}{child}", file=out)
+
+def transform(input: str, debug: bool = False) -> str:
+    if not debug:
+        return to_toml(input)
+    treee = get_parser().parse(input)
+    dump_tree(treee)
+    a = T().transform(treee)
+    output = tomli_w.dumps(a)
+    return output
+
+def error_message(e):
+    """Ошибка разбора или преобразования одной строкой"""
+    if isinstance(e, lark.exceptions.VisitError):
+        e = e.orig_exc
+    text = str(e).strip().splitlines()
+    return f"{type(e).__name__}: {text[0] if text else ''}"
+
+def convert_file(task, inline=True):
+    """(исходный, результат) -> (исходный, ошибка или None, секунды); выполняется в процессе пула"""
+    src, dst = task
+    t0 = time.perf_counter()
+    try:
+        with open(src, 'r', encoding='utf-8') as f:
+            output = to_toml(f.read(), inline)
+        os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+        with open(dst, 'w', encoding='utf-8') as f:
+            f.write(output)
+    except Exception as e:
+        return src, error_message(e), time.perf_counter() - t0
+    return src, None, time.perf_counter() - t0
+
+def find_tasks(src_dir, out_dir, suffix):
+    """Файлы DSL в каталоге (рекурсивно) и пути .toml с той же структурой в out_dir"""
+    tasks = []
+    for root, dirs, files in os.walk(src_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(suffix):
+                src = os.path.join(root, name)
+                rel = os.path.relpath(src, src_dir)
+                tasks.append((src, os.path.join(out_dir, rel[:len(rel) - len(suffix)] + '.toml')))
+    return tasks
+
+def convert_directory(tasks, jobs, cache_dir=PARSER_CACHE_DIR, inline=True):
+    """Преобразовать файлы в пуле из jobs процессов; результаты в порядке заданий"""
+    convert = partial(convert_file, inline=inline)
+    if jobs == 1 or len(tasks) <= 1:
+        yield from map(convert, tasks)
+        return
+    # Мелких файлов тысячи: задания уходят в процессы пачками
+    chunksize = max(1, min(64, len(tasks) // (jobs * 4)))
+    with ProcessPoolExecutor(jobs, initializer=get_parser, initargs=(cache_dir, inline)) as pool:
+        yield from pool.map(convert, tasks, chunksize=chunksize)
+
+def main():
+    parser = argparse.ArgumentParser(description='Преобразование конфигураций DSL в TOML')
+    parser.add_argument('input', help='Файл DSL или каталог с файлами DSL')
+    parser.add_argument('--output', help='Файл или каталог для TOML (по умолчанию stdout для файла, <каталог>_toml для каталога)')
+    parser.add_argument('--suffix', default='.dsl', help='Расширение файлов DSL в каталоге')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Число процессов')
+    parser.add_argument('--no-parser-cache', action='store_true', help='Не использовать кэш таблиц парсера на диске')
+    parser.add_argument('--tree', action='store_true', help='Строить дерево разбора и преобразовывать его отдельным проходом')
+    parser.add_argument('--debug', action='store_true', help='Вывести дерево разбора в stderr (для одного файла)')
+    args = parser.parse_args()
+
+    cache_dir = None if args.no_parser_cache else PARSER_CACHE_DIR
+    if args.jobs <= 0:
+        print("Ошибка: число процессов должно быть > 0")
+        sys.exit(1)
+
+    inline = not args.tree
+    if not os.path.isdir(args.input):
+        get_parser(cache_dir, inline=inline and not args.debug)
+        try:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                text = f.read()
+            if args.debug:
+                tree = get_parser().parse(text)
+                dump_tree(tree, sys.stderr)
+                output = tomli_w.dumps(T().transform(tree))
+            else:
+                output = to_toml(text, inline)
+        except OSError as e:
+            print(f"Ошибка: {e}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"Ошибка: {args.input}: {error_message(e)}")
+            sys.exit(1)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(output)
+        else:
+            print(output, end='')
+        return
+
+    out_dir = args.output or args.input.rstrip(os.sep) + '_toml'
+    tasks = find_tasks(args.input, out_dir, args.suffix)
+    if not tasks:
+        print(f"Ошибка: в {args.input} нет файлов {args.suffix}")
+        sys.exit(1)
+    # Таблицы строятся (или читаются из кэша) до запуска пула, процессы берут готовый кэш
+    get_parser(cache_dir, inline)
+    t0 = time.perf_counter()
+    failed = 0
+    for src, error, _ in convert_directory(tasks, args.jobs, cache_dir, inline):
+        if error is not None:
+            failed += 1
+            print(f"{src}: {error}")
+    elapsed = time.perf_counter() - t0
+    print(f"Файлов: {len(tasks)}, ошибок: {failed}, время: {elapsed:.2f} с, результат в {out_dir}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
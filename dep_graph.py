@@ -0,0 +1,135 @@
+import json
+from collections import deque
+
+class DependencyGraph:
+    """Граф зависимостей: узлы с числовыми id, списки смежности, атрибуты ребер"""
+
+    def __init__(self):
+        self.names = []          # id -> имя крейта
+        self.ids = {}            # имя -> id
+        self.versions = []       # id -> версия крейта (если известна)
+        self.resolved = []       # id -> True, если Cargo.toml узла получен и разобран
+        self.out_edges = []      # id -> список номеров исходящих ребер
+        # Ребра в параллельных списках
+        self.edge_src = []
+        self.edge_dst = []
+        self.edge_req = []
+        self.edge_kind = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_node(self, name, version=None):
+        """Id узла по имени; узел создается при первом обращении"""
+        node = self.ids.get(name)
+        if node is None:
+            node = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.versions.append(version)
+            self.resolved.append(False)
+            self.out_edges.append([])
+        elif version is not None:
+            self.versions[node] = version
+        return node
+
+    def add_edge(self, src, dst, req=None, kind='normal'):
+        """Добавить ребро между узлами (имена или id); вернуть номер ребра"""
+        if isinstance(src, str):
+            src = self.add_node(src)
+        if isinstance(dst, str):
+            dst = self.add_node(dst)
+        edge = len(self.edge_src)
+        self.edge_src.append(src)
+        self.edge_dst.append(dst)
+        self.edge_req.append(req)
+        self.edge_kind.append(kind)
+        self.out_edges[src].append(edge)
+        return edge
+
+    def successors(self, node):
+        dst = self.edge_dst
+        return [dst[edge] for edge in self.out_edges[node]]
+
+    def edges(self):
+        """Ребра: (имя источника, имя зависимости, версия, вид)"""
+        names = self.names
+        for src, dst, req, kind in zip(self.edge_src, self.edge_dst, self.edge_req, self.edge_kind):
+            yield names[src], names[dst], req, kind
+
+    def bfs(self, root, max_depth=None):
+        """Обход в ширину за O(V+E): (id узла, глубина)"""
+        start = self.ids[root] if isinstance(root, str) else root
+        depth = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            yield node, depth[node]
+            if max_depth is not None and depth[node] >= max_depth:
+                continue
+            for succ in self.successors(node):
+                if succ not in depth:
+                    depth[succ] = depth[node] + 1
+                    queue.append(succ)
+
+    def to_dict(self):
+        return {
+            'nodes': [{'name': name, 'version': version, 'resolved': resolved}
+                      for name, version, resolved in zip(self.names, self.versions, self.resolved)],
+            'edges': [list(edge) for edge in zip(self.edge_src, self.edge_dst, self.edge_req, self.edge_kind)],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        graph = cls()
+        for node in data['nodes']:
+            node_id = graph.add_node(node['name'], node.get('version'))
+            graph.resolved[node_id] = node.get('resolved', False)
+        for src, dst, req, kind in data['edges']:
+            graph.add_edge(src, dst, req, kind)
+        return graph
+
+    def save_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load_json(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_tree(cls, tree):
+        """Граф из прежнего представления {пакет: {зависимость: {зависимость: {...}}}}"""
+        graph = cls()
+
+        def walk(package, deps):
+            node = graph.add_node(package)
+            for dep, subtree in deps.items():
+                graph.add_edge(node, dep)
+                for name, sub_deps in subtree.items():
+                    walk(name, sub_deps)
+
+        for package, deps in tree.items():
+            walk(package, deps)
+        return graph
+
+    def to_tree(self, root, max_depth, visited=None, current_depth=0):
+        """Прежнее представление - вложенные словари.
+
+        Повторно встреченный пакет и пакет глубже max_depth дают {}, как в
+        старом рекурсивном обходе. visited можно передать для общего учета
+        между вызовами.
+        """
+        visited = set() if visited is None else visited
+
+        def build(node, depth):
+            name = self.names[node]
+            if depth > max_depth or name in visited:
+                return {}
+            visited.add(name)
+            children = {}
+            for succ in self.successors(node):
+                children[self.names[succ]] = build(succ, depth + 1)
+            return {name: children}
+
+        return build(self.ids[root], current_depth)
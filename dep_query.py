@@ -0,0 +1,317 @@
+import argparse
+import fnmatch
+import json
+import re
+import sys
+from collections import deque
+
+from dep_graph import DependencyGraph
+
+def compile_filter(pattern, mode='substring'):
+    """Фильтр имен пакетов, компилируется один раз: substring, glob или regex"""
+    if not pattern:
+        return lambda name: True
+    if mode == 'substring':
+        pattern = pattern.lower()
+        return lambda name: pattern in name.lower()
+    if mode == 'glob':
+        return re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+    if mode == 'regex':
+        return re.compile(pattern).search
+    raise ValueError(f"неизвестный вид фильтра {mode!r}")
+
+def load_graph(path):
+    """Граф из --graph-json или из снимка (--snapshot)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if 'graph' in data:
+        data = data['graph']
+    try:
+        return DependencyGraph.from_dict(data)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"{path}: неверный формат графа ({e})")
+
+class GraphIndex:
+    """Индексы над разрешенным графом для быстрых запросов.
+
+    Прямые и обратные списки смежности без повторов строятся сразу;
+    компоненты сильной связности и размеры замыканий - при первом запросе.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        n = len(graph)
+        self.succ = [[] for _ in range(n)]
+        self.pred = [[] for _ in range(n)]
+        seen = set()
+        for src, dst in zip(graph.edge_src, graph.edge_dst):
+            if (src, dst) not in seen:
+                seen.add((src, dst))
+                self.succ[src].append(dst)
+                self.pred[dst].append(src)
+        self._components = None
+        self._component_of = None
+        self._closure = None
+
+    def node(self, name):
+        node = self.graph.ids.get(name)
+        if node is None:
+            raise KeyError(f"пакет {name} не найден в графе")
+        return node
+
+    def names(self, nodes):
+        names = self.graph.names
+        return [names[node] for node in nodes]
+
+    def select(self, predicate):
+        """Пакеты, имена которых проходят фильтр"""
+        return [name for name in self.graph.names if predicate(name)]
+
+    def dependencies(self, name, transitive=False):
+        return self._reach(self.node(name), self.succ, transitive)
+
+    def reverse_dependencies(self, name, transitive=False):
+        """Пакеты, которые зависят от name (прямо или транзитивно)"""
+        return self._reach(self.node(name), self.pred, transitive)
+
+    def _reach(self, start, adjacency, transitive):
+        if not transitive:
+            return self.names(adjacency[start])
+        seen = {start}
+        order = []
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for nxt in adjacency[node]:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    order.append(nxt)
+                    queue.append(nxt)
+        return self.names(order)
+
+    def shortest_path(self, source, target):
+        """Кратчайший путь по числу ребер или None"""
+        start, goal = self.node(source), self.node(target)
+        parent = {start: None}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                return self.names(reversed(path))
+            for nxt in self.succ[node]:
+                if nxt not in parent:
+                    parent[nxt] = node
+                    queue.append(nxt)
+        return None
+
+    def all_paths(self, source, target, limit=None, max_length=None):
+        """Простые пути source -> target (не больше limit, не длиннее max_length ребер).
+
+        Расстояния до target считаются заранее: узлы, из которых target
+        недостижим, отбрасываются, а ближние к target обходятся первыми.
+        """
+        start, goal = self.node(source), self.node(target)
+        distance = {goal: 0}
+        queue = deque([goal])
+        while queue:
+            node = queue.popleft()
+            for prev in self.pred[node]:
+                if prev not in distance:
+                    distance[prev] = distance[node] + 1
+                    queue.append(prev)
+        if start not in distance or start == goal:
+            return []
+
+        def children(node):
+            # Пути длиннее max_length отсекаются по оставшемуся расстоянию
+            budget = None if max_length is None else max_length - len(path)
+            nodes = [nxt for nxt in self.succ[node] if nxt in distance
+                     and (budget is None or distance[nxt] <= budget)]
+            nodes.sort(key=distance.__getitem__)
+            return iter(nodes)
+
+        paths = []
+        path = [start]
+        on_path = {start}
+        stack = [children(start)]
+        while stack:
+            for nxt in stack[-1]:
+                if nxt == goal:
+                    paths.append(self.names(path + [goal]))
+                    if limit is not None and len(paths) >= limit:
+                        return paths
+                elif nxt not in on_path:
+                    path.append(nxt)
+                    on_path.add(nxt)
+                    stack.append(children(nxt))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(path.pop())
+        return paths
+
+    def components(self):
+        """Компоненты сильной связности (итеративный Тарьян), в обратном топологическом порядке"""
+        if self._components is not None:
+            return self._components
+        n = len(self.graph)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack = []
+        components = []
+        counter = 0
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            work = [(root, iter(self.succ[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if index[child] == -1:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, iter(self.succ[child])))
+                        break
+                    if on_stack[child] and index[child] < low[node]:
+                        low[node] = index[child]
+                else:
+                    work.pop()
+                    if work and low[node] < low[work[-1][0]]:
+                        low[work[-1][0]] = low[node]
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        component_of = [0] * n
+        for number, component in enumerate(components):
+            for node in component:
+                component_of[node] = number
+        self._components = components
+        self._component_of = component_of
+        return components
+
+    def _is_cyclic(self, component):
+        node = component[0]
+        return len(component) > 1 or node in self.succ[node]
+
+    def strongly_connected(self):
+        return [self.names(component) for component in self.components()]
+
+    def cycles(self):
+        """Компоненты, содержащие циклы (включая пакет, зависящий от себя)"""
+        return [self.names(component) for component in self.components() if self._is_cyclic(component)]
+
+    def closure_sizes(self):
+        """Число пакетов, транзитивно достижимых из каждого пакета.
+
+        Считается по конденсации графа: множества достижимых узлов - битовые
+        маски (int), компоненты обходятся в обратном топологическом порядке.
+        """
+        if self._closure is not None:
+            return self._closure
+        components = self.components()
+        component_of = self._component_of
+        members = []
+        reach = []
+        for component in components:
+            mask = 0
+            for node in component:
+                mask |= 1 << node
+            members.append(mask)
+            # Тарьян выдает компоненту после всех достижимых из нее
+            total = mask if self._is_cyclic(component) else 0
+            for node in component:
+                for nxt in self.succ[node]:
+                    other = component_of[nxt]
+                    if other != component_of[node]:
+                        total |= members[other] | reach[other]
+            reach.append(total)
+        sizes = [0] * len(self.graph)
+        for number, component in enumerate(components):
+            size = reach[number].bit_count()
+            for node in component:
+                sizes[node] = size
+        self._closure = dict(zip(self.graph.names, sizes))
+        return self._closure
+
+def main():
+    parser = argparse.ArgumentParser(description='Запросы к графу зависимостей Rust')
+    parser.add_argument('graph', help='Граф (--graph-json) или снимок (--snapshot)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rdeps = commands.add_parser('rdeps', help='Обратные зависимости пакета')
+    rdeps.add_argument('package')
+    rdeps.add_argument('--transitive', action='store_true', help='Все, а не только прямые')
+
+    deps = commands.add_parser('deps', help='Зависимости пакета')
+    deps.add_argument('package')
+    deps.add_argument('--transitive', action='store_true', help='Все, а не только прямые')
+
+    path = commands.add_parser('path', help='Путь между пакетами')
+    path.add_argument('source')
+    path.add_argument('target')
+    path.add_argument('--all', action='store_true', help='Все простые пути')
+    path.add_argument('--limit', type=int, default=100, help='Максимум путей для --all')
+    path.add_argument('--max-length', type=int, help='Максимальная длина пути для --all (по умолчанию кратчайший + 2)')
+
+    commands.add_parser('cycles', help='Циклические зависимости')
+    commands.add_parser('scc', help='Компоненты сильной связности')
+
+    closure = commands.add_parser('closure', help='Размер транзитивного замыкания')
+    closure.add_argument('--top', type=int, default=20, help='Сколько пакетов показать')
+
+    select = commands.add_parser('select', help='Пакеты по фильтру')
+    select.add_argument('pattern')
+    select.add_argument('--mode', choices=['substring', 'glob', 'regex'], default='glob')
+
+    args = parser.parse_args()
+
+    try:
+        index = GraphIndex(load_graph(args.graph))
+        if args.command == 'rdeps':
+            result = index.reverse_dependencies(args.package, args.transitive)
+        elif args.command == 'deps':
+            result = index.dependencies(args.package, args.transitive)
+        elif args.command == 'path':
+            if args.all:
+                if args.max_length is None:
+                    shortest = index.shortest_path(args.source, args.target)
+                    args.max_length = len(shortest) + 1 if shortest else 0
+                result = [' -> '.join(p) for p in index.all_paths(args.source, args.target, args.limit, args.max_length)]
+            else:
+                shortest = index.shortest_path(args.source, args.target)
+                result = [' -> '.join(shortest)] if shortest else []
+        elif args.command == 'cycles':
+            result = [' '.join(component) for component in index.cycles()]
+        elif args.command == 'scc':
+            result = [' '.join(component) for component in index.strongly_connected()]
+        elif args.command == 'closure':
+            sizes = sorted(index.closure_sizes().items(), key=lambda item: -item[1])
+            result = [f"{name} {size}" for name, size in sizes[:args.top]]
+        else:
+            result = index.select(compile_filter(args.pattern, args.mode))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ошибка: {e.args[0] if isinstance(e, KeyError) else e}")
+        sys.exit(1)
+
+    for line in result:
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import sys
+
+from dep_graph import DependencyGraph
+
+SNAPSHOT_VERSION = 1
+
+class Snapshot:
+    """Сохраненный граф зависимостей с хэшами Cargo.toml каждого пакета"""
+
+    def __init__(self, graph, root, version, max_depth, manifests=None):
+        self.graph = graph
+        self.root = root
+        self.version = version
+        self.max_depth = max_depth
+        # имя -> {'repo_url': ..., 'ref': ..., 'digest': sha1 содержимого Cargo.toml}
+        self.manifests = manifests or {}
+
+    def digest(self, name, repo_url, ref):
+        """Хэш сохраненного манифеста, если пакет брался из того же репозитория и ветки"""
+        entry = self.manifests.get(name)
+        if entry is None or entry['repo_url'] != repo_url or entry['ref'] != ref:
+            return None
+        return entry['digest']
+
+    def reusable(self, name, repo_url, ref, digest=None):
+        """Версия и зависимости [(имя, требование, вид)] пакета из снимка.
+
+        None, если пакета нет в снимке, он не был разобран или (при
+        заданном digest) его Cargo.toml с тех пор изменился.
+        """
+        saved = self.digest(name, repo_url, ref)
+        if saved is None or (digest is not None and saved != digest):
+            return None
+        graph = self.graph
+        node = graph.ids.get(name)
+        if node is None or not graph.resolved[node]:
+            return None
+        deps = [(graph.names[graph.edge_dst[edge]], graph.edge_req[edge], graph.edge_kind[edge])
+                for edge in graph.out_edges[node]]
+        return graph.versions[node], deps
+
+    def save(self, path):
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'root': self.root,
+            'ref': self.version,
+            'max_depth': self.max_depth,
+            'manifests': self.manifests,
+            'graph': self.graph.to_dict(),
+        }
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Прочитать снимок; ValueError для чужого или поврежденного файла"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"{path}: неподдерживаемая версия снимка")
+        try:
+            graph = DependencyGraph.from_dict(data['graph'])
+            return cls(graph, data['root'], data['ref'], data['max_depth'], data['manifests'])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{path}: поврежденный снимок ({e})")
+
+def _edge_requirements(graph):
+    """{(пакет, зависимость): требование к версии}; первое ребро пары"""
+    requirements = {}
+    for src, dst, req, kind in graph.edges():
+        requirements.setdefault((src, dst), req)
+    return requirements
+
+def diff(old, new):
+    """Разница двух графов: добавленные, удаленные и перевыпущенные ребра.
+
+    added/removed - списки (пакет, зависимость, требование), changed -
+    (пакет, зависимость, старое требование, новое), versions - пакеты с
+    изменившейся версией: (пакет, старая, новая).
+    """
+    old_edges = _edge_requirements(old)
+    new_edges = _edge_requirements(new)
+    added = [(src, dst, req) for (src, dst), req in new_edges.items() if (src, dst) not in old_edges]
+    removed = [(src, dst, req) for (src, dst), req in old_edges.items() if (src, dst) not in new_edges]
+    changed = [(src, dst, old_edges[src, dst], req) for (src, dst), req in new_edges.items()
+               if (src, dst) in old_edges and old_edges[src, dst] != req]
+    versions = []
+    for name, node in new.ids.items():
+        old_node = old.ids.get(name)
+        if old_node is not None and old.versions[old_node] != new.versions[node]:
+            versions.append((name, old.versions[old_node], new.versions[node]))
+    return {'added': added, 'removed': removed, 'changed': changed, 'versions': versions}
+
+def print_diff(result):
+    for src, dst, req in sorted(result['added']):
+        print(f"+ {src} -> {dst} {req or ''}".rstrip())
+    for src, dst, req in sorted(result['removed']):
+        print(f"- {src} -> {dst} {req or ''}".rstrip())
+    for src, dst, old_req, new_req in sorted(result['changed'], key=lambda c: c[:2]):
+        print(f"~ {src} -> {dst} {old_req} => {new_req}")
+    for name, old_version, new_version in sorted(result['versions']):
+        print(f"* {name} {old_version} => {new_version}")
+    print(f"Добавлено: {len(result['added'])}, удалено: {len(result['removed'])}, "
+          f"изменено требований: {len(result['changed'])}, версий: {len(result['versions'])}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Снимки графа зависимостей Rust')
+    commands = parser.add_subparsers(dest='command', required=True)
+    diff_parser = commands.add_parser('diff', help='Сравнить два снимка без повторного анализа')
+    diff_parser.add_argument('old', help='Старый снимок')
+    diff_parser.add_argument('new', help='Новый снимок')
+    diff_parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+    args = parser.parse_args()
+
+    try:
+        old = Snapshot.load(args.old)
+        new = Snapshot.load(args.new)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+
+    result = diff(old.graph, new.graph)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print_diff(result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import os
+from xml.sax.saxutils import escape
+
+# Размеры для SVG-раскладки по слоям
+LAYER_WIDTH = 220
+ROW_HEIGHT = 36
+NODE_HEIGHT = 24
+CHAR_WIDTH = 7
+MARGIN = 20
+
+def _matches(graph, package_filter):
+    """Список флагов по id узла: проходит ли имя фильтр (подстрока или функция)"""
+    if callable(package_filter):
+        return [bool(package_filter(name)) for name in graph.names]
+    package_filter = package_filter.lower()
+    if not package_filter:
+        return [True] * len(graph)
+    return [package_filter in name.lower() for name in graph.names]
+
+def filtered_edges(graph, package_filter=''):
+    """Ребра (id, id, версия, вид), оба конца которых проходят фильтр.
+
+    Повторы внутри одного узла отбрасываются, поэтому память ограничена
+    числом зависимостей одного крейта, а не всего графа.
+    """
+    shown = _matches(graph, package_filter)
+    dst, req, kind = graph.edge_dst, graph.edge_req, graph.edge_kind
+    for node, edges in enumerate(graph.out_edges):
+        if not shown[node]:
+            continue
+        seen = set()
+        for edge in edges:
+            target = dst[edge]
+            if shown[target] and target not in seen:
+                seen.add(target)
+                yield node, target, req[edge], kind[edge]
+
+def _quote(name):
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def write_plantuml(graph, f, package_filter=''):
+    f.write("@startuml\n")
+    f.write("skinparam monochrome true\n")
+    f.write("skinparam shadowing false\n")
+    f.write("left to right direction\n")
+    names = graph.names
+    for src, dst, req, kind in filtered_edges(graph, package_filter):
+        arrow = '-->' if kind == 'normal' else '..>'
+        f.write(f"{_quote(names[src])} {arrow} {_quote(names[dst])}\n")
+    f.write("@enduml\n")
+
+def write_dot(graph, f, package_filter=''):
+    f.write("digraph dependencies {\n")
+    f.write("  rankdir=LR;\n")
+    f.write("  node [shape=box, fontname=\"Helvetica\"];\n")
+    names = graph.names
+    shown = _matches(graph, package_filter)
+    # Узлы без ребер тоже должны попасть в граф
+    for node, name in enumerate(names):
+        if shown[node] and not graph.out_edges[node]:
+            f.write(f"  {_quote(name)};\n")
+    for src, dst, req, kind in filtered_edges(graph, package_filter):
+        attrs = []
+        if req:
+            attrs.append(f"tooltip={_quote(req)}")
+        if kind != 'normal':
+            attrs.append("style=dashed")
+        suffix = f" [{', '.join(attrs)}]" if attrs else ''
+        f.write(f"  {_quote(names[src])} -> {_quote(names[dst])}{suffix};\n")
+    f.write("}\n")
+
+def layout(graph, shown, root=0):
+    """Раскладка по слоям: слой - расстояние от корня, строка - порядок в слое.
+
+    Возвращает координаты левого верхнего угла по id узла (None для скрытых)
+    и размеры рисунка.
+    """
+    layer = [0] * len(graph)
+    if len(graph):
+        for node, depth in graph.bfs(root):
+            layer[node] = depth
+    rows = {}
+    positions = [None] * len(graph)
+    for node in range(len(graph)):
+        if not shown[node]:
+            continue
+        row = rows.get(layer[node], 0)
+        rows[layer[node]] = row + 1
+        positions[node] = (MARGIN + layer[node] * LAYER_WIDTH, MARGIN + row * ROW_HEIGHT)
+    width = 2 * MARGIN + (max(rows) + 1) * LAYER_WIDTH if rows else 2 * MARGIN
+    height = 2 * MARGIN + max(rows.values()) * ROW_HEIGHT if rows else 2 * MARGIN
+    return positions, width, height
+
+def _node_width(name):
+    return min(LAYER_WIDTH - 40, 16 + CHAR_WIDTH * len(name))
+
+def write_svg(graph, f, package_filter=''):
+    """Самодостаточный SVG без внешних программ: узлы по слоям, ребра - линии"""
+    shown = _matches(graph, package_filter)
+    positions, width, height = layout(graph, shown)
+    names = graph.names
+    f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'font-family="Helvetica, sans-serif" font-size="12">\n')
+    f.write('<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" '
+            'markerHeight="6" orient="auto"><path d="M0,0 L10,5 L0,10 z"/></marker></defs>\n')
+    f.write('<g stroke="#555" fill="none" marker-end="url(#arrow)">\n')
+    half = NODE_HEIGHT // 2
+    for src, dst, req, kind in filtered_edges(graph, package_filter):
+        x1, y1 = positions[src]
+        x2, y2 = positions[dst]
+        x1 += _node_width(names[src])
+        dash = '' if kind == 'normal' else ' stroke-dasharray="4,3"'
+        f.write(f'<line x1="{x1}" y1="{y1 + half}" x2="{x2}" y2="{y2 + half}"{dash}/>\n')
+    f.write('</g>\n<g>\n')
+    for node, name in enumerate(names):
+        if positions[node] is None:
+            continue
+        x, y = positions[node]
+        f.write(f'<rect x="{x}" y="{y}" width="{_node_width(name)}" height="{NODE_HEIGHT}" '
+                f'fill="#fff" stroke="#000"/>'
+                f'<text x="{x + 8}" y="{y + 16}">{escape(name)}</text>\n')
+    f.write('</g>\n</svg>\n')
+
+WRITERS = {
+    'puml': write_plantuml,
+    'dot': write_dot,
+    'svg': write_svg,
+}
+
+def format_from_path(path):
+    """Формат по расширению файла: .puml/.plantuml, .dot/.gv, .svg"""
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    return {'plantuml': 'puml', 'gv': 'dot'}.get(ext, ext)
+
+def render(graph, path, fmt=None, package_filter=''):
+    """Записать граф в файл; ребра пишутся по мере обхода, без сборки текста в памяти"""
+    fmt = fmt or format_from_path(path)
+    writer = WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"неизвестный формат {fmt!r} (ожидается {', '.join(WRITERS)})")
+    with open(path, 'w', encoding='utf-8', buffering=1 << 16) as f:
+        writer(graph, f, package_filter)
+    return fmt
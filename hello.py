@@ -1,54 +1,219 @@
+import hashlib
+import io
+import marshal
 import shlex
 import sys
 import os
 
-def execute_command(line, script_path=None):
-    """Выполнить одну команду"""
-    line = line.strip()
-    if not line or line.startswith('#'):
-        return True
+from vfs import OverlayVFS, VFSError, open_vfs
 
-    if script_path:
-        print(f"vfs@{line}")
+# Разобранные скрипты по хэшу содержимого
+SCRIPT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'vfs_shell')
+SCRIPT_CACHE_VERSION = 1
+OUTPUT_BUFFER = 1 << 16
+
+class Session:
+    """Состояние оболочки: загруженная VFS, текущий каталог и поток вывода"""
+
+    def __init__(self, vfs=None, out=None):
+        self.vfs = vfs
+        self.cwd = '/'
+        self.out = out
+
+    def print(self, *args):
+        print(*args, file=self.out or sys.stdout)
+
+# Сессия по умолчанию для скрипта и REPL
+session = Session()
+
+def cmd_exit(args, session):
+    return False
+
+def cmd_ls(args, session):
+    if session.vfs is None:
+        session.print(args)
+        return
+    vfs = session.vfs
+    # Ключи вида -la пока игнорируются
+    paths = [arg for arg in args[1:] if not arg.startswith('-')] or ['.']
+    for path in paths:
+        node, full = vfs.resolve(path, session.cwd)
+        if not vfs.is_dir(node):
+            session.print(full)
+            continue
+        if len(paths) > 1:
+            session.print(f"{full}:")
+        listing = vfs.listing(node)
+        if listing:
+            session.print(listing)
+
+def cmd_cd(args, session):
+    if session.vfs is None:
+        session.print(args)
+        return
+    node, full = session.vfs.resolve(args[1] if len(args) > 1 else '/', session.cwd)
+    if not session.vfs.is_dir(node):
+        raise VFSError(f"{full}: не каталог")
+    session.cwd = full
+
+def cmd_cat(args, session):
+    if session.vfs is None:
+        raise VFSError("VFS не загружена")
+    out = session.out or sys.stdout
+    for path in args[1:]:
+        node, _ = session.vfs.resolve(path, session.cwd)
+        out.write(bytes(session.vfs.read(node)).decode('utf-8', errors='replace'))
 
+def cmd_mkdir(args, session):
+    if session.vfs is None:
+        raise VFSError("VFS не загружена")
+    for path in args[1:]:
+        session.vfs.mkdir(path, session.cwd)
+
+def cmd_touch(args, session):
+    if session.vfs is None:
+        raise VFSError("VFS не загружена")
+    for path in args[1:]:
+        try:
+            session.vfs.resolve(path, session.cwd)
+        except VFSError:
+            session.vfs.create(path, session.cwd)
+
+def cmd_rm(args, session):
+    if session.vfs is None:
+        raise VFSError("VFS не загружена")
+    for path in args[1:]:
+        session.vfs.remove(path, session.cwd)
+
+# Реестр команд: имя -> функция(args, session); False из функции завершает работу
+COMMANDS = {
+    'exit': cmd_exit,
+    'ls': cmd_ls,
+    'cd': cmd_cd,
+    'cat': cmd_cat,
+    'mkdir': cmd_mkdir,
+    'touch': cmd_touch,
+    'rm': cmd_rm,
+}
+
+def parse_line(line):
+    """Строка скрипта -> (строка, аргументы, ошибка); None для пустых строк и комментариев"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
     try:
         args = shlex.split(line)
     except ValueError as e:
-        print(f"Ошибка парсинга: {e}")
+        return line, None, str(e)
+    return line, args, None
+
+def dispatch(line, args, error, session, echo=False, commands=COMMANDS):
+    """Выполнить разобранную команду по реестру commands; False - конец работы"""
+    if echo:
+        session.print(f"vfs@{line}")
+    if error is not None:
+        session.print(f"Ошибка парсинга: {error}")
+        return True
+    if not args:
+        return True
+    command = commands.get(args[0])
+    if command is None:
+        session.print(f"{args[0]}: command not found")
+        return True
+    try:
+        return command(args, session) is not False
+    except VFSError as e:
+        session.print(f"{args[0]}: {e}")
         return True
-    
-    if len(args) == 0:
+
+def execute_command(line, script_path=None, session=session):
+    """Выполнить одну команду"""
+    parsed = parse_line(line)
+    if parsed is None:
         return True
-    
-    if args[0] == "exit":
-        return False
-    elif args[0] == "ls":
-        print(args)
-    elif args[0] == "cd":
-        print(args)
-    else:
-        print(f"{args[0]}: command not found")
-    
+    return dispatch(*parsed, session, echo=bool(script_path))
+
+def parse_script(data):
+    """Весь скрипт -> список (строка, аргументы, ошибка)"""
+    commands = []
+    for line in data.decode('utf-8').splitlines():
+        parsed = parse_line(line)
+        if parsed is not None:
+            commands.append(parsed)
+    return commands
+
+def load_script(script_path, cache_dir=SCRIPT_CACHE_DIR):
+    """Разобранный скрипт; повторный запуск того же содержимого берет разбор из кэша"""
+    with open(script_path, 'rb') as f:
+        data = f.read()
+    if cache_dir is None:
+        return parse_script(data)
+    digest = hashlib.sha1(data).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{digest}.{SCRIPT_CACHE_VERSION}.marshal")
+    try:
+        with open(cache_path, 'rb') as f:
+            # loads по всему файлу заметно быстрее чтения marshal.load из потока
+            return marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    commands = parse_script(data)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            marshal.dump(commands, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+    return commands
+
+def run_commands(commands, session, echo=True):
+    """Выполнить список команд; False, если встретился exit"""
+    for line, args, error in commands:
+        if not dispatch(line, args, error, session, echo):
+            return False
     return True
 
-def run_script(script_path):
-    """Выполнить стартовый скрипт"""
+def run_script(script_path, cache_dir=SCRIPT_CACHE_DIR):
+    """Выполнить стартовый скрипт: разбор целиком, вывод блоками"""
     try:
-        with open(script_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if not execute_command(line, script_path):
-                    break
+        commands = load_script(script_path, cache_dir)
     except FileNotFoundError:
         print(f"Ошибка: файл скрипта '{script_path}' не найден")
         sys.exit(1)
-    except Exception as e:
+    except (OSError, UnicodeDecodeError) as e:
         print(f"Ошибка выполнения скрипта: {e}")
         sys.exit(1)
 
+    sys.stdout.flush()
+    out = _buffered_stdout()
+    session.out = out
+    try:
+        return run_commands(commands, session)
+    except Exception as e:
+        session.print(f"Ошибка выполнения скрипта: {e}")
+        out.flush()
+        sys.exit(1)
+    finally:
+        out.flush()
+        session.out = None
+
+def _buffered_stdout():
+    """Поток с блочной буферизацией поверх дескриптора stdout (или сам stdout без дескриптора)"""
+    try:
+        fd = sys.stdout.fileno()
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return sys.stdout
+    raw = io.FileIO(fd, 'w', closefd=False)
+    return io.TextIOWrapper(io.BufferedWriter(raw, OUTPUT_BUFFER), encoding=sys.stdout.encoding, errors='replace')
+
 def main():
     vfs_path = None
     script_path = None
-    
+    batch = False
+    cache_dir = SCRIPT_CACHE_DIR
+    serve_address = None
+
     # Обработка параметров командной строки
     i = 1
     while i < len(sys.argv):
@@ -58,18 +223,47 @@ def main():
         elif sys.argv[i] == '--script' and i + 1 < len(sys.argv):
             script_path = sys.argv[i + 1]
             i += 2
+        elif sys.argv[i] == '--batch':
+            # Только скрипт, без интерактивного режима
+            batch = True
+            i += 1
+        elif sys.argv[i] == '--no-script-cache':
+            cache_dir = None
+            i += 1
+        elif sys.argv[i] == '--serve' and i + 1 < len(sys.argv):
+            # Сервер сессий: unix:<путь> или [127.0.0.1:]<порт>
+            serve_address = sys.argv[i + 1]
+            i += 2
         else:
             i += 1
-    
+
     # Отладочный вывод параметров
     print("=== Параметры эмулятора ===")
     print(f"VFS путь: {vfs_path if vfs_path else 'не задан'}")
     print(f"Стартовый скрипт: {script_path if script_path else 'не задан'}")
     print("===========================")
-    
+
+    base = None
+    if vfs_path:
+        try:
+            base = open_vfs(vfs_path)
+        except VFSError as e:
+            print(f"Ошибка: не удалось загрузить VFS: {e}")
+            sys.exit(1)
+        # Изменения сессии не трогают загруженный образ
+        session.vfs = OverlayVFS(base)
+
+    if serve_address:
+        from shell_server import run_server
+        run_server(base, serve_address)
+        return
+
     if script_path:
-        run_script(script_path)
-    
+        run_script(script_path, cache_dir)
+
+    if batch:
+        return
+
     # REPL режим
     while True:
         try:
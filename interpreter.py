@@ -1,51 +1,249 @@
 import sys
-import csv
+import time
+import struct
 import argparse
+from itertools import islice
+
+from vm_memory import ADDRESS_SPACE, DenseMemory, make_memory
+from bitrev import REV16, bitrev_array
+import memdump
+import translator
+import vm_checkpoint
+from vm_profile import NO_REGISTER, PAGE_BITS, Profiler, TraceWriter
+
+# Коды операций
+OP_LOAD = 15
+OP_READ = 17
+OP_WRITE = 8
+OP_BITREV = 25
+
+def decode(code):
+    """Декодировать бинарный файл в список команд (opcode, b, c, d)"""
+    program = []
+    append = program.append
+    # Каждая команда - 5 байт: младшие 4 байта и старший байт
+    for lo, hi in struct.iter_unpack('<IB', code[:len(code) - len(code) % 5]):
+        a = lo & 0x1F
+
+        if a == OP_LOAD:
+            append((a, (lo >> 5) & 0x1F, (lo >> 10) & 0x1FFFFF, 0))
+        elif a == OP_READ:
+            append((a, (lo >> 5) & 0x1FFF, (lo >> 18) & 0x1F, (lo >> 23) & 0x1F))
+        elif a == OP_WRITE:
+            append((a, (lo >> 5) & 0x1F, ((hi << 32 | lo) >> 10) & 0x7FFFFFF, 0))
+        elif a == OP_BITREV:
+            append((a, (lo >> 5) & 0x1F, (lo >> 10) & 0x1F, 0))
+        else:
+            # Неизвестная команда сохраняется, чтобы индекс совпадал с pc // 5
+            append((a, 0, 0, 0))
+    return program
 
 class VM:
-    def __init__(self, mem_size=1024):
-        self.memory = [0] * mem_size
+    def __init__(self, mem_size=ADDRESS_SPACE, memory='auto', translate=False, cache_dir=None):
+        self.memory = make_memory(memory, mem_size)
+        self.mem_size = len(self.memory)
         self.registers = [0] * 32
+        self.code = b''
+        self.program = []
+        # Индекс следующей команды (pc // 5)
+        self.pc = 0
+        # Режим трансляции в Python-код и каталог кэша трансляций
+        self.translate = translate
+        self.cache_dir = cache_dir
+        # Профилировщик и трасса; если оба None, работает цикл без инструментирования
+        self.profiler = None
+        self.trace = None
+
+        # Таблица обработчиков по коду операции
+        self.handlers = [self._op_nop] * 32
+        self.handlers[OP_LOAD] = self._op_load
+        self.handlers[OP_READ] = self._op_read
+        self.handlers[OP_WRITE] = self._op_write
+        self.handlers[OP_BITREV] = self._op_bitrev
+
+    def _op_nop(self, b, c, d):
+        pass
 
-    def run(self, bin_path, csv_path, m_range):
+    def _op_load(self, b, c, d):
+        self.registers[b] = c
+
+    def _op_read(self, b, c, d):
+        addr = self.registers[c] + b
+        self.registers[d] = self.memory.read(addr) if addr < self.mem_size else 0
+
+    def _op_write(self, b, c, d):
+        if c < self.mem_size: self.memory.write(c, self.registers[b])
+
+    def _op_bitrev(self, b, c, d):
+        orig = self.registers[b] & 0xFFFFFFFF
+        rev = (REV16[orig & 0xFFFF] << 16) | REV16[orig >> 16]
+        addr = self.registers[c]
+        if addr < self.mem_size: self.memory.write(addr, rev)
+
+    def bitrev_range(self, start, end):
+        """Bit reverse всех ячеек памяти в диапазоне start-end одним вызовом"""
+        self.memory.store(start, bitrev_array(self.memory.values(start, end + 1)))
+
+    def load(self, bin_path):
+        """Загрузить и декодировать программу"""
         with open(bin_path, 'rb') as f:
-            code = f.read()
-
-        pc = 0
-        while pc + 5 <= len(code):
-            val = int.from_bytes(code[pc:pc+5], 'little')
-            a = val & 0x1F
-            
-            if a == 15: # LOAD
-                b, c = (val >> 5) & 0x1F, (val >> 10) & 0x1FFFFF
-                self.registers[b] = c
-            elif a == 17: # READ
-                b, c, d = (val >> 5) & 0x1FFF, (val >> 18) & 0x1F, (val >> 23) & 0x1F
-                addr = self.registers[c] + b
-                self.registers[d] = self.memory[addr] if addr < len(self.memory) else 0
-            elif a == 8: # WRITE
-                b, c = (val >> 5) & 0x1F, (val >> 10) & 0x7FFFFFF
-                if c < len(self.memory): self.memory[c] = self.registers[b]
-            elif a == 25: # BITREV
-                b, c = (val >> 5) & 0x1F, (val >> 10) & 0x1F
-                orig = self.registers[b] & 0xFFFFFFFF
-                rev = int('{:032b}'.format(orig)[::-1], 2)
-                addr = self.registers[c]
-                if addr < len(self.memory): self.memory[addr] = rev
-            pc += 5
-
-        start, end = map(int, m_range.split('-'))
-        with open(csv_path, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Address', 'Value'])
-            for i in range(start, end + 1):
-                writer.writerow([i, self.memory[i]])
-        print(f"Дамп памяти сохранен в {csv_path}")
+            self.code = f.read()
+        self.program = decode(self.code)
+
+    def execute(self, limit=None):
+        """Выполнить программу с текущего pc до команды limit, вернуть число команд"""
+        stop = len(self.program) if limit is None else min(limit, len(self.program))
+        if stop <= self.pc:
+            return 0
+        start, self.pc = self.pc, stop
+
+        if self.profiler is not None or self.trace is not None:
+            self._execute_instrumented(start, stop)
+        elif self.translate and start == 0 and stop == len(self.program):
+            # Трансляция применяется только к программе целиком
+            dense = isinstance(self.memory, DenseMemory)
+            blocks = translator.get_blocks(self.code, self.program, self.mem_size, dense, self.cache_dir)
+            translator.run_blocks(blocks, self.registers, self.memory)
+        else:
+            handlers = self.handlers
+            for a, b, c, d in islice(self.program, start, stop):
+                handlers[a](b, c, d)
+        return stop - start
+
+    def _execute_instrumented(self, start, stop):
+        """Цикл с профилированием и/или трассой; выбирается один раз в execute()"""
+        if self.trace is None:
+            self._execute_profiled(start, stop)
+        elif self.profiler is None:
+            self._execute_traced(start, stop)
+        else:
+            self._execute_profiled_traced(start, stop)
+
+    def _execute_profiled(self, start, stop):
+        """Только профиль: счетчики страниц и время по кодам операций"""
+        handlers = self.handlers
+        regs = self.registers
+        mem_size = self.mem_size
+        prof = self.profiler
+        reads, writes, times, counts = prof.reads, prof.writes, prof.times, prof.counts
+        clock = time.perf_counter_ns
+
+        for a, b, c, d in islice(self.program, start, stop):
+            if a == OP_READ:
+                addr = regs[c] + b
+                if addr < mem_size: reads[addr >> PAGE_BITS] += 1
+            elif a == OP_WRITE:
+                if c < mem_size: writes[c >> PAGE_BITS] += 1
+            elif a == OP_BITREV:
+                if regs[c] < mem_size: writes[regs[c] >> PAGE_BITS] += 1
+            t0 = clock()
+            handlers[a](b, c, d)
+            times[a] += clock() - t0
+            counts[a] += 1
+
+    def _execute_traced(self, start, stop):
+        """Только трасса: команда и измененный регистр"""
+        handlers = self.handlers
+        regs = self.registers
+        record = self.trace.record
+
+        for index, (a, b, c, d) in enumerate(islice(self.program, start, stop), start):
+            handlers[a](b, c, d)
+            reg = b if a == OP_LOAD else d if a == OP_READ else NO_REGISTER
+            record(index, a, b, c, d, reg, regs[reg] if reg != NO_REGISTER else 0)
+
+    def _execute_profiled_traced(self, start, stop):
+        """Профиль и трасса вместе"""
+        handlers = self.handlers
+        regs = self.registers
+        mem_size = self.mem_size
+        prof = self.profiler
+        reads, writes, times, counts = prof.reads, prof.writes, prof.times, prof.counts
+        record = self.trace.record
+        clock = time.perf_counter_ns
+
+        for index, (a, b, c, d) in enumerate(islice(self.program, start, stop), start):
+            if a == OP_READ:
+                addr = regs[c] + b
+                if addr < mem_size: reads[addr >> PAGE_BITS] += 1
+            elif a == OP_WRITE:
+                if c < mem_size: writes[c >> PAGE_BITS] += 1
+            elif a == OP_BITREV:
+                if regs[c] < mem_size: writes[regs[c] >> PAGE_BITS] += 1
+            t0 = clock()
+            handlers[a](b, c, d)
+            times[a] += clock() - t0
+            counts[a] += 1
+            reg = b if a == OP_LOAD else d if a == OP_READ else NO_REGISTER
+            record(index, a, b, c, d, reg, regs[reg] if reg != NO_REGISTER else 0)
+
+    def dump(self, path, m_range, fmt='csv', sparse=False):
+        """Сохранить диапазоны памяти в CSV, raw-бинарный файл или .npy"""
+        memdump.dump(self.memory, path, m_range, fmt, sparse)
+        print(f"Дамп памяти сохранен в {path}")
+
+    def checkpoint(self, path):
+        """Сохранить состояние VM в файл"""
+        vm_checkpoint.save(self, path)
+        print(f"Состояние сохранено в {path} (команда {self.pc})")
+
+    def restore(self, path):
+        """Продолжить с сохраненного состояния"""
+        vm_checkpoint.restore(self, path)
+
+    def run(self, bin_path, csv_path, m_range, stats=False, fmt='csv', sparse=False,
+            checkpoint_path=None, checkpoint_at=None):
+        self.load(bin_path)
+        t0 = time.perf_counter()
+        count = 0
+        if checkpoint_path and checkpoint_at is not None:
+            count += self.execute(checkpoint_at)
+            self.checkpoint(checkpoint_path)
+        count += self.execute()
+        elapsed = time.perf_counter() - t0
+        if self.trace is not None:
+            self.trace.close()
+        self.dump(csv_path, m_range, fmt, sparse)
+        if self.profiler is not None:
+            print(self.profiler.report())
+        if stats:
+            speed = count / elapsed if elapsed > 0 else 0
+            print(f"Выполнено команд: {count} за {elapsed:.3f} с ({speed:.0f} команд/с)")
+            print(f"Выделено памяти: {self.memory.footprint()} байт")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("binary")
     parser.add_argument("csv")
-    parser.add_argument("range")
+    parser.add_argument("range", help="Диапазоны адресов, например 0-200,4096-8192")
+    parser.add_argument("--stats", action="store_true", help="Вывести скорость выполнения")
+    parser.add_argument("--memory", choices=['auto', 'dense', 'paged'], default='auto', help="Тип памяти")
+    parser.add_argument("--mem-size", type=int, default=ADDRESS_SPACE, help="Размер памяти в словах")
+    parser.add_argument("--format", choices=sorted(memdump.WRITERS), default='csv', help="Формат дампа")
+    parser.add_argument("--sparse", action="store_true", help="Сохранять только ненулевые ячейки")
+    parser.add_argument("--translate", action="store_true", help="Транслировать программу в Python-код")
+    parser.add_argument("--cache-dir", help="Каталог кэша трансляций")
+    parser.add_argument("--profile", action="store_true", help="Профиль по командам и страницам памяти")
+    parser.add_argument("--trace", help="Файл для бинарной трассы выполнения")
+    parser.add_argument("--restore", help="Начать с сохраненного состояния")
+    parser.add_argument("--checkpoint", help="Файл для сохранения состояния")
+    parser.add_argument("--checkpoint-at", type=int, help="Номер команды, перед которой сохраняется состояние")
     args = parser.parse_args()
-    VM().run(args.binary, args.csv, args.range)
+    if args.checkpoint and args.checkpoint_at is None:
+        print("Ошибка: для --checkpoint нужен --checkpoint-at")
+        sys.exit(1)
+    vm = VM(args.mem_size, args.memory, args.translate, args.cache_dir)
+    if args.restore:
+        vm.restore(args.restore)
+    # Диапазоны проверяются до выполнения, а не после долгого прогона
+    try:
+        ranges = memdump.parse_ranges(args.range, vm.mem_size)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    if args.profile:
+        vm.profiler = Profiler()
+    if args.trace:
+        vm.trace = TraceWriter(args.trace)
+    vm.run(args.binary, args.csv, ranges, args.stats, args.format, args.sparse,
+           args.checkpoint, args.checkpoint_at)
@@ -0,0 +1,149 @@
+import json
+import os
+from collections import deque
+
+from cargo_manifest import read_manifest
+
+INDEX_VERSION = 1
+INDEX_FILE = '.deps_index.json'
+
+# Каталоги, в которых не бывает исходников крейтов
+SKIP_DIRS = {'.git', 'target', 'node_modules'}
+
+def _manifest_entry(path):
+    """Имя пакета и зависимости из Cargo.toml: {имя: {версия: [зависимости]}}"""
+    manifest = read_manifest(path)
+    if manifest.name is None:
+        return {}
+    return {manifest.name: {manifest.version or '0.0.0': manifest.dependency_names()}}
+
+def _index_entry(path):
+    """Файл crates.io-index: по строке JSON на версию"""
+    versions = {}
+    name = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('yanked'):
+                continue
+            name = record['name']
+            versions[record['vers']] = [dep.get('package', dep['name']) for dep in record.get('deps', [])
+                                        if dep.get('kind', 'normal') == 'normal']
+    return {name: versions} if name else {}
+
+class LocalRegistry:
+    """Индекс локального зеркала крейтов: имя -> файл, с обновлением по mtime"""
+
+    def __init__(self, root, index_path=None):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or os.path.join(self.root, INDEX_FILE)
+        # Зеркало crates.io-index узнаем по config.json в корне
+        self.is_index = os.path.exists(os.path.join(self.root, 'config.json'))
+        self.files = {}
+        self.names = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION and data.get('root') == self.root:
+                self.files = data['files']
+        except (OSError, ValueError):
+            pass
+        self._rebuild_names()
+
+    def _rebuild_names(self):
+        self.names = {}
+        for rel, entry in self.files.items():
+            for name in entry['crates']:
+                self.names[name] = rel
+
+    def _walk(self):
+        """Все файлы зеркала, которые нужно индексировать: (относительный путь, stat)"""
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith('.') or entry.name in SKIP_DIRS:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif self.is_index:
+                    if entry.name != 'config.json':
+                        yield os.path.relpath(entry.path, self.root), entry.stat()
+                elif entry.name == 'Cargo.toml':
+                    yield os.path.relpath(entry.path, self.root), entry.stat()
+
+    def scan(self):
+        """Обновить индекс: разбираются только новые и измененные файлы"""
+        stats = {'files': 0, 'parsed': 0, 'removed': 0, 'errors': 0}
+        seen = set()
+        for rel, st in self._walk():
+            seen.add(rel)
+            stats['files'] += 1
+            old = self.files.get(rel)
+            if old and old['mtime'] == st.st_mtime and old['size'] == st.st_size:
+                continue
+            path = os.path.join(self.root, rel)
+            try:
+                crates = _index_entry(path) if self.is_index else _manifest_entry(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ошибка разбора {rel}: {e}")
+                stats['errors'] += 1
+                crates = {}
+            self.files[rel] = {'mtime': st.st_mtime, 'size': st.st_size, 'crates': crates}
+            stats['parsed'] += 1
+
+        for rel in list(self.files):
+            if rel not in seen:
+                del self.files[rel]
+                stats['removed'] += 1
+
+        self._rebuild_names()
+        self.save()
+        return stats
+
+    def save(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'root': self.root, 'files': self.files}, f)
+        os.replace(tmp, self.index_path)
+
+    def location(self, name):
+        """Путь к файлу с описанием крейта или None"""
+        rel = self.names.get(name)
+        return os.path.join(self.root, rel) if rel else None
+
+    def dependencies(self, name, version='latest'):
+        """Зависимости крейта; для 'latest' берется последняя версия в файле"""
+        rel = self.names.get(name)
+        if rel is None:
+            return None
+        versions = self.files[rel]['crates'][name]
+        if version in versions:
+            return versions[version]
+        return versions[list(versions)[-1]] if versions else []
+
+    def resolve(self, package, max_depth, package_filter='', version='latest'):
+        """Граф зависимостей в ширину до max_depth: {пакет: [зависимости]}"""
+        package_filter = package_filter.lower()
+        graph = {}
+        queue = deque([(package, 0)])
+        seen = {package}
+        while queue:
+            name, depth = queue.popleft()
+            # Версия задается только для корневого пакета
+            deps = self.dependencies(name, version if depth == 0 else 'latest')
+            deps = [dep for dep in deps or () if package_filter in dep.lower()]
+            graph[name] = deps
+            if depth + 1 > max_depth:
+                continue
+            for dep in deps:
+                if dep not in seen:
+                    seen.add(dep)
+                    queue.append((dep, depth + 1))
+        return graph
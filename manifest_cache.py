@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'cargo_manifests')
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def cargo_toml_url(repo_url, version, raw_base='https://raw.githubusercontent.com'):
+    """URL raw-файла Cargo.toml для GitHub репозитория или None для других хостингов"""
+    if 'github.com' not in repo_url:
+        return None
+    path = urlsplit(repo_url).path.rstrip('/')
+    if path.endswith('.git'):
+        path = path[:-4]
+    branch = version if version != 'latest' else 'main'
+    return f"{raw_base.rstrip('/')}{path}/{branch}/Cargo.toml"
+
+class ManifestCache:
+    """Кэш Cargo.toml на диске: ключ - URL файла, TTL, ETag/Last-Modified, LRU"""
+
+    def __init__(self, path=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'requests': 0}
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(path, 'index.json')
+        os.makedirs(path, exist_ok=True)
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _key(self, url):
+        # Ключ - URL запроса целиком: записи с зеркала (--raw-base) не смешиваются с основными
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    def _read(self, key):
+        entry = self.index[key]
+        if entry['status'] != 200:
+            return None
+        try:
+            with open(os.path.join(self.path, key + '.toml'), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _usable(self, key):
+        """(годна ли запись, текст); запись 200 без читаемого файла не годится"""
+        entry = self.index.get(key)
+        if entry is None:
+            return False, None
+        text = self._read(key)
+        return text is not None or entry['status'] != 200, text
+
+    def _drop(self, key):
+        self.index.pop(key, None)
+        try:
+            os.remove(os.path.join(self.path, key + '.toml'))
+        except OSError:
+            pass
+
+    def get(self, repo_url, ref, url, fetch):
+        """Получить Cargo.toml из кэша или через fetch(url, headers) -> ответ requests"""
+        key = self._key(url)
+        now = time.time()
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is not None and (self.offline or now - entry['fetched_at'] < self.ttl):
+                usable, text = self._usable(key)
+                if usable:
+                    entry['used_at'] = now
+                    self.stats['hits'] += 1
+                    return text
+                self._drop(key)
+                entry = None
+            if self.offline:
+                self.stats['misses'] += 1
+                return None
+            headers = {}
+            if entry is not None and entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry is not None and entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            self.stats['requests'] += 1
+
+        response = fetch(url, headers)
+
+        if response.status_code == 304:
+            with self._lock:
+                usable, text = self._usable(key)
+                if usable:
+                    entry = self.index[key]
+                    entry['fetched_at'] = entry['used_at'] = now
+                    self.stats['revalidated'] += 1
+                    return text
+                # Запись вытеснена или файл пропал, пока шел запрос: повторить без условных заголовков
+                self._drop(key)
+                self.stats['requests'] += 1
+            response = fetch(url, {})
+
+        with self._lock:
+            self.stats['misses'] += 1
+            if response.status_code not in (200, 404):
+                return None
+            # Отсутствующий Cargo.toml (404) тоже кэшируется, чтобы повторный запуск не ходил в сеть
+            text = response.text if response.status_code == 200 else None
+            self._put(key, repo_url, ref, response, text, now)
+            return text
+
+    def _put(self, key, repo_url, ref, response, text, now):
+        size = 0
+        if text is not None:
+            data = text.encode('utf-8')
+            size = len(data)
+            with open(os.path.join(self.path, key + '.toml'), 'wb') as f:
+                f.write(data)
+        self.index[key] = {
+            'repo_url': repo_url,
+            'ref': ref,
+            'status': response.status_code,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': now,
+            'used_at': now,
+            'size': size,
+        }
+        self._evict()
+
+    def _evict(self):
+        """Удалить давно не использованные записи, пока кэш больше max_bytes"""
+        total = sum(entry['size'] for entry in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self.index, key=lambda k: self.index[k]['used_at']):
+            entry = self.index.pop(key)
+            total -= entry['size']
+            try:
+                os.remove(os.path.join(self.path, key + '.toml'))
+            except OSError:
+                pass
+            if total <= self.max_bytes:
+                break
+
+    def _save(self):
+        tmp = self._index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self._index_path)
+
+    def save(self):
+        """Сохранить индекс; вызывается в конце анализа"""
+        with self._lock:
+            self._evict()
+            self._save()
+
+    def report(self):
+        s = self.stats
+        return (f"Кэш Cargo.toml: попаданий {s['hits']}, промахов {s['misses']}, "
+                f"подтверждено 304: {s['revalidated']}, сетевых запросов {s['requests']}")
+
+def add_cache_arguments(parser):
+    """Общие параметры командной строки для кэша"""
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Каталог кэша Cargo.toml')
+    parser.add_argument('--cache-ttl', type=int, default=DEFAULT_TTL, help='Время жизни записи кэша, с')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES, help='Максимальный размер кэша, байт')
+    parser.add_argument('--no-cache', action='store_true', help='Не использовать кэш')
+    parser.add_argument('--offline', action='store_true', help='Только кэш, без сетевых запросов')
+
+def cache_from_args(args):
+    if args.no_cache:
+        if args.offline:
+            raise SystemExit("Ошибка: --offline требует кэша")
+        return None
+    return ManifestCache(args.cache_dir, args.cache_ttl, args.cache_size, args.offline)
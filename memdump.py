@@ -0,0 +1,98 @@
+import csv
+import sys
+from array import array
+
+# Размер блока при выгрузке, в словах
+CHUNK = 1 << 16
+
+def parse_ranges(m_range, mem_size):
+    """Разобрать список диапазонов вида '0-200,4096-8192'"""
+    ranges = []
+    for part in m_range.split(','):
+        try:
+            start, end = map(int, part.split('-'))
+        except ValueError:
+            raise ValueError(f"неверный диапазон '{part}', ожидается начало-конец") from None
+        if start > end:
+            raise ValueError(f"диапазон {part}: начало больше конца")
+        if not 0 <= start <= end < mem_size:
+            raise ValueError(f"диапазон {part} вне памяти (0-{mem_size - 1})")
+        ranges.append((start, end + 1))
+    return ranges
+
+def _chunks(memory, ranges):
+    """Значения памяти блоками: (начальный адрес, array('I'))"""
+    for start, stop in ranges:
+        for pos in range(start, stop, CHUNK):
+            yield pos, memory.values(pos, min(pos + CHUNK, stop))
+
+def _pairs(memory, ranges):
+    """Ненулевые ячейки всех диапазонов"""
+    for start, stop in ranges:
+        yield from memory.nonzero(start, stop)
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array('I', values)
+        values.byteswap()
+    return values
+
+def write_csv(f, memory, ranges, sparse=False):
+    writer = csv.writer(f)
+    writer.writerow(['Address', 'Value'])
+    if sparse:
+        writer.writerows(_pairs(memory, ranges))
+        return
+    for pos, values in _chunks(memory, ranges):
+        writer.writerows(zip(range(pos, pos + len(values)), values))
+
+def write_bin(f, memory, ranges, sparse=False):
+    """Сырые little-endian uint32; в режиме sparse - пары адрес, значение"""
+    if sparse:
+        flat = array('I')
+        for pair in _pairs(memory, ranges):
+            flat.extend(pair)
+            if len(flat) >= CHUNK:
+                f.write(_little_endian(flat).tobytes())
+                flat = array('I')
+        f.write(_little_endian(flat).tobytes())
+        return
+    for _, values in _chunks(memory, ranges):
+        f.write(_little_endian(values).tobytes())
+
+def _npy_header(shape):
+    """Заголовок .npy версии 1.0 для массива '<u4'"""
+    header = "{'descr': '<u4', 'fortran_order': False, 'shape': %r, }" % (shape,)
+    # Magic (6) + версия (2) + длина (2) + заголовок + '\n' кратны 64
+    pad = 64 - (10 + len(header) + 1) % 64
+    header = header + ' ' * (pad % 64) + '\n'
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+def write_npy(f, memory, ranges, sparse=False):
+    """Массив .npy без numpy: (N,) значений или (N, 2) пар в режиме sparse"""
+    if sparse:
+        flat = array('I')
+        for pair in _pairs(memory, ranges):
+            flat.extend(pair)
+        f.write(_npy_header((len(flat) // 2, 2)))
+        f.write(_little_endian(flat).tobytes())
+        return
+    f.write(_npy_header((sum(stop - start for start, stop in ranges),)))
+    for _, values in _chunks(memory, ranges):
+        f.write(_little_endian(values).tobytes())
+
+WRITERS = {
+    'csv': write_csv,
+    'bin': write_bin,
+    'npy': write_npy,
+}
+
+def dump(memory, path, m_range, fmt='csv', sparse=False):
+    """Сохранить один или несколько диапазонов памяти в файл; m_range - строка или уже разобранные диапазоны"""
+    ranges = parse_ranges(m_range, len(memory)) if isinstance(m_range, str) else m_range
+    if fmt == 'csv':
+        with open(path, 'w', newline='') as f:
+            write_csv(f, memory, ranges, sparse)
+    else:
+        with open(path, 'wb') as f:
+            WRITERS[fmt](f, memory, ranges, sparse)
@@ -0,0 +1,3 @@
+@echo off
+REM Тест упаковки VFS: ссылки на файлы, битые ссылки, временный файл при ошибке
+python vfs.py --self-test
@@ -3,27 +3,98 @@ import sys
 import os
 import requests
 import json
+import re
 import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from cargo_manifest import content_hash, parse_manifest
+from dep_graph import DependencyGraph
+from dep_query import compile_filter
+from dep_snapshot import Snapshot
+from graph_render import WRITERS, format_from_path, render
+from manifest_cache import add_cache_arguments, cache_from_args, cargo_toml_url
 
 class CargoAnalyzer:
-    def __init__(self):
+    def __init__(self, concurrency=8, per_host=4, raw_base='https://raw.githubusercontent.com',
+                 dep_repo_template='https://github.com/rust-lang/{name}', cache=None, shared=False):
         self.visited_packages = set()
-        
+        # Кэш Cargo.toml на диске (ManifestCache) или None
+        self.cache = cache
+        # Сколько Cargo.toml загружается одновременно, всего и с одного хоста
+        self.concurrency = concurrency
+        self.per_host = per_host
+        # Адрес сервера raw-файлов; для тестов можно указать локальный сервер
+        self.raw_base = raw_base.rstrip('/')
+        self.dep_repo_template = dep_repo_template
+
+        # Общая сессия с пулом соединений на все потоки
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._host_limits = {}
+        self._host_lock = threading.Lock()
+        # Пул загрузок создается при первом анализе и служит всем вызовам
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # С shared=True разобранные Cargo.toml запоминаются для следующих вызовов
+        # resolve_graph (пакетный режим): (URL репозитория, ветка) -> Future
+        self.shared = shared
+        self._resolved = {}
+
+    def pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.concurrency)
+            return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self.session.close()
+
+    def _shared(self, key, compute):
+        """Результат compute() один раз на ключ, даже при одновременных запросах"""
+        with self._pool_lock:
+            future = self._resolved.get(key)
+            owner = future is None
+            if owner:
+                future = self._resolved[key] = Future()
+        if owner:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result(), not owner
+
+    def _host_limit(self, url):
+        """Семафор, ограничивающий число запросов к одному хосту"""
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def _fetch(self, url, headers):
+        with self._host_limit(url):
+            return self.session.get(url, headers=headers)
+
     def get_cargo_toml_from_github(self, repo_url, package, version):
         """Получить Cargo.toml из GitHub репозитория"""
         try:
-            if 'github.com' in repo_url:
-                raw_url = repo_url.replace('github.com', 'raw.githubusercontent.com')
-                if raw_url.endswith('.git'):
-                    raw_url = raw_url[:-4]
-                
-                branch = version if version != 'latest' else 'main'
-                cargo_url = f"{raw_url}/{branch}/Cargo.toml"
-            else:
+            cargo_url = cargo_toml_url(repo_url, version, self.raw_base)
+            if cargo_url is None:
                 print(f"Ошибка: неподдерживаемый репозиторий {repo_url}")
                 return None
             
-            response = requests.get(cargo_url)
+            if self.cache is not None:
+                return self.cache.get(repo_url, version, cargo_url, self._fetch)
+            response = self._fetch(cargo_url, {})
             return response.text if response.status_code == 200 else None
             
         except Exception as e:
@@ -31,93 +102,120 @@ class CargoAnalyzer:
             return None
 
     def parse_cargo_toml(self, content, current_package):
-        """Парсим зависимости из Cargo.toml"""
-        dependencies = []
-        
+        """Парсим зависимости из Cargo.toml (обычные и платформенные)"""
         try:
-            lines = content.split('\n')
-            in_dependencies_section = False
-            
-            for line in lines:
-                line = line.strip()
-                
-                if line == '[dependencies]':
-                    in_dependencies_section = True
-                    continue
-                elif line.startswith('[') and in_dependencies_section:
-                    break
-                
-                if in_dependencies_section and line and not line.startswith('#'):
-                    line = line.split('#')[0].strip()
-                    if line:
-                        dep_name = line.split('=')[0].strip()
-                        if dep_name and dep_name != current_package:
-                            dependencies.append(dep_name)
-                            
-        except Exception as e:
+            return [dep for dep in parse_manifest(content).dependency_names() if dep != current_package]
+        except ValueError as e:
             print(f"Ошибка парсинга Cargo.toml: {e}")
-        
-        return dependencies
+            return []
 
-    def get_dependency_tree(self, package, repo_url, version, max_depth, current_depth=0):
-        """Рекурсивно получаем дерево зависимостей"""
-        if current_depth > max_depth or package in self.visited_packages:
-            return {}
-            
-        self.visited_packages.add(package)
-        
-        print(f"Анализируем {package} (глубина {current_depth})")
-        cargo_content = self.get_cargo_toml_from_github(repo_url, package, version)
-        
-        if not cargo_content:
-            return {package: {}}
-        
-        dependencies = self.parse_cargo_toml(cargo_content, package)
-        tree = {package: {}}
-        
-        for dep in dependencies:
-            # Для демонстрации используем те же URL для зависимостей
-            dep_repo_url = f"https://github.com/rust-lang/{dep}"
-            tree[package][dep] = self.get_dependency_tree(
-                dep, dep_repo_url, version, max_depth, current_depth + 1
-            )
-        
-        return tree
-
-    def generate_plantuml(self, dependency_tree, output_file, package_filter):
-        """Генерируем PlantUML код и сохраняем как PNG"""
-        plantuml_code = ["@startuml"]
-        plantuml_code.append("skinparam monochrome true")
-        plantuml_code.append("skinparam shadowing false")
-        plantuml_code.append("left to right direction")
-        
-        def add_relationships(tree, parent=None):
-            for package, deps in tree.items():
-                # Применяем фильтр если указан
-                if package_filter and package_filter.lower() not in package.lower():
+    def resolve_graph(self, package, repo_url, version, max_depth, current_depth=0,
+                      snapshot=None, trust_snapshot=False):
+        """Загрузить Cargo.toml по уровням (BFS), каждый уровень - параллельно.
+
+        Возвращает DependencyGraph: ребра с требованием к версии и видом
+        зависимости, у пакетов до max_depth отмечено resolved. С прежним
+        снимком (Snapshot) заново разбираются только изменившиеся Cargo.toml;
+        с trust_snapshot пакеты из того же репозитория и ветки берутся из
+        снимка без загрузки. Хэши манифестов остаются в self.manifests.
+        """
+        graph, self.manifests, self.snapshot_stats = self.resolve(
+            package, repo_url, version, max_depth, current_depth, snapshot, trust_snapshot)
+        return graph
+
+    def _load_manifest(self, name, url, version, snapshot):
+        """(хэш Cargo.toml, (версия, зависимости), взят ли из снимка)"""
+        content = self.get_cargo_toml_from_github(url, name, version)
+        if not content:
+            return None, None, False
+        digest = content_hash(content)
+        saved = snapshot.reusable(name, url, version, digest) if snapshot is not None else None
+        if saved is not None:
+            return digest, saved, True
+        try:
+            manifest = parse_manifest(content, digest)
+        except ValueError as e:
+            print(f"Ошибка парсинга Cargo.toml: {e}")
+            return None, None, False
+        deps = [(dep.package, dep.req, dep.kind) for dep in manifest.unique_dependencies()
+                if dep.package != name]
+        return digest, (manifest.version, deps), False
+
+    def resolve(self, package, repo_url, version, max_depth, current_depth=0,
+                snapshot=None, trust_snapshot=False, verbose=True):
+        """То же, что resolve_graph, без записи в self: (граф, хэши манифестов, статистика).
+
+        Можно вызывать из нескольких потоков одновременно.
+        """
+        graph = DependencyGraph()
+        graph.add_node(package)
+        seen = {package}
+        level = [(package, repo_url)]
+        depth = current_depth
+        manifests = {}
+        stats = {'reused': 0, 'parsed': 0, 'shared': 0}
+
+        def fetch(item):
+            name, url = item
+            if trust_snapshot and snapshot is not None:
+                saved = snapshot.reusable(name, url, version)
+                if saved is not None:
+                    return snapshot.digest(name, url, version), saved, 'reused'
+            if not self.shared:
+                digest, saved, reused = self._load_manifest(name, url, version, snapshot)
+                return digest, saved, 'reused' if reused else 'parsed'
+            (digest, saved, reused), hit = self._shared(
+                (url, version), lambda: self._load_manifest(name, url, version, snapshot))
+            return digest, saved, 'shared' if hit else 'reused' if reused else 'parsed'
+
+        pool = self.pool()
+        while level and depth <= max_depth:
+            for name, _ in level:
+                if verbose:
+                    print(f"Анализируем {name} (глубина {depth})")
+            next_level = []
+            for (name, url), (digest, resolved, source) in zip(level, pool.map(fetch, level)):
+                if resolved is None:
                     continue
-                    
-                if parent:
-                    plantuml_code.append(f'"{parent}" --> "{package}"')
-                
-                if deps:
-                    for dep_name, sub_deps in deps.items():
-                        if package_filter and package_filter.lower() not in dep_name.lower():
-                            continue
-                        add_relationships({dep_name: sub_deps}, package)
-        
-        add_relationships(dependency_tree)
-        plantuml_code.append("@enduml")
-        
-        # Сохраняем PlantUML код
-        plantuml_text = '\n'.join(plantuml_code)
-        with open('graph.puml', 'w', encoding='utf-8') as f:
-            f.write(plantuml_text)
+                stats[source] += 1
+                manifests[name] = {'repo_url': url, 'ref': version, 'digest': digest}
+                crate_version, deps = resolved
+                node = graph.add_node(name, crate_version)
+                graph.resolved[node] = True
+                for dep, req, kind in deps:
+                    graph.add_edge(node, dep, req, kind)
+                    if dep not in seen:
+                        seen.add(dep)
+                        next_level.append((dep, self.dep_repo_template.format(name=dep)))
+            level = next_level
+            depth += 1
+        return graph, manifests, stats
+
+    def get_dependency_tree(self, package, repo_url, version, max_depth, current_depth=0):
+        """Получаем дерево зависимостей (прежний формат вложенных словарей)"""
+        graph = self.resolve_graph(package, repo_url, version, max_depth, current_depth)
+        return graph.to_tree(package, max_depth, self.visited_packages, current_depth)
+
+    def render_graph(self, dependency_graph, output_file, package_filter, fmt=None):
+        """Сохраняем граф локально: PlantUML, DOT или SVG (формат по расширению файла)"""
+        # Поддерживаем и прежнее дерево из вложенных словарей
+        if isinstance(dependency_graph, dict):
+            dependency_graph = DependencyGraph.from_tree(dependency_graph)
+        fmt = render(dependency_graph, output_file, fmt, package_filter)
+        print(f"Граф сохранен как: {output_file} ({fmt})")
+
+    def generate_plantuml(self, dependency_graph, output_file, package_filter, online=False):
+        """Генерируем PlantUML код рядом с output_file; PNG - только онлайн сервером PlantUML"""
+        puml_file = os.path.splitext(output_file)[0] + '.puml'
+        self.render_graph(dependency_graph, puml_file, package_filter, 'puml')
+        if not online:
+            return
         
         # Конвертируем в PNG используя PlantUML онлайн сервер
         try:
             import urllib.parse
-            encoded = urllib.parse.quote(plantuml_text)
+            with open(puml_file, 'r', encoding='utf-8') as f:
+                encoded = urllib.parse.quote(f.read())
             url = f"http://www.plantuml.com/plantuml/png/~1{encoded}"
             
             response = requests.get(url)
@@ -129,7 +227,7 @@ class CargoAnalyzer:
                 print("Ошибка генерации PNG")
         except Exception as e:
             print(f"Ошибка при создании PNG: {e}")
-            print("PlantUML код сохранен в graph.puml")
+            print(f"PlantUML код сохранен в {puml_file}")
 
 def main():
     parser = argparse.ArgumentParser(description='Визуализатор зависимостей Rust')
@@ -137,25 +235,76 @@ def main():
     parser.add_argument('--package', required=True, help='Имя пакета')
     parser.add_argument('--repo-url', required=True, help='URL репозитория')
     parser.add_argument('--version', default='latest', help='Версия пакета')
-    parser.add_argument('--output', default='dependency_graph.png', help='Файл для графа')
+    parser.add_argument('--output', default='dependency_graph.svg', help='Файл для графа (.svg, .dot, .puml или .png)')
+    parser.add_argument('--format', choices=list(WRITERS) + ['png'], help='Формат графа (по умолчанию по расширению)')
+    parser.add_argument('--online', action='store_true', help='Строить PNG онлайн сервером PlantUML')
     parser.add_argument('--max-depth', type=int, default=3, help='Глубина анализа')
     parser.add_argument('--filter', default='', help='Фильтр пакетов')
+    parser.add_argument('--filter-mode', choices=['substring', 'glob', 'regex'], default='substring',
+                        help='Вид фильтра: подстрока, шаблон glob или регулярное выражение')
+    parser.add_argument('--concurrency', type=int, default=8, help='Число одновременных загрузок')
+    parser.add_argument('--per-host', type=int, default=4, help='Число одновременных загрузок с одного хоста')
+    parser.add_argument('--raw-base', default='https://raw.githubusercontent.com', help='Сервер raw-файлов')
+    parser.add_argument('--graph-json', help='Сохранить граф в JSON')
+    parser.add_argument('--snapshot', help='Снимок графа: прежний используется для повторного анализа, новый сохраняется')
+    parser.add_argument('--trust-snapshot', action='store_true',
+                        help='Не загружать Cargo.toml пакетов, которые уже есть в снимке с той же веткой')
+    add_cache_arguments(parser)
     
     args = parser.parse_args()
     
-    analyzer = CargoAnalyzer()
+    fmt = args.format or format_from_path(args.output)
+    if fmt == 'png' and not args.online:
+        print("Ошибка: PNG строится только сервером PlantUML, укажите --online или файл .svg/.dot/.puml")
+        sys.exit(1)
+    if fmt not in WRITERS and fmt != 'png':
+        print(f"Ошибка: неизвестный формат {fmt}")
+        sys.exit(1)
+    
+    try:
+        package_filter = compile_filter(args.filter, args.filter_mode)
+    except re.error as e:
+        print(f"Ошибка: неверное регулярное выражение: {e}")
+        sys.exit(1)
+    
+    snapshot = None
+    if args.snapshot and os.path.exists(args.snapshot):
+        try:
+            snapshot = Snapshot.load(args.snapshot)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка: {e}")
+            sys.exit(1)
+    
+    cache = cache_from_args(args)
+    analyzer = CargoAnalyzer(args.concurrency, args.per_host, args.raw_base, cache=cache)
     
     print(f"Анализируем пакет: {args.package}")
     print(f"Версия: {args.version}")
     print(f"Глубина: {args.max_depth}")
     
-    # Получаем дерево зависимостей
-    dependency_tree = analyzer.get_dependency_tree(
-        args.package, args.repo_url, args.version, args.max_depth
+    # Получаем граф зависимостей
+    dependency_graph = analyzer.resolve_graph(
+        args.package, args.repo_url, args.version, args.max_depth,
+        snapshot=snapshot, trust_snapshot=args.trust_snapshot
     )
+    print(f"Пакетов: {len(dependency_graph)}, связей: {len(dependency_graph.edge_src)}")
+    analyzer.close()
+    if args.snapshot:
+        Snapshot(dependency_graph, args.package, args.version, args.max_depth, analyzer.manifests).save(args.snapshot)
+        stats = analyzer.snapshot_stats
+        print(f"Снимок сохранен в {args.snapshot}: из снимка {stats['reused']}, разобрано {stats['parsed']}")
+    if args.graph_json:
+        dependency_graph.save_json(args.graph_json)
+    
+    if cache is not None:
+        cache.save()
+        print(cache.report())
     
     # Генерируем визуализацию
-    analyzer.generate_plantuml(dependency_tree, args.output, args.filter)
+    if fmt == 'png':
+        analyzer.generate_plantuml(dependency_graph, args.output, package_filter, online=True)
+    else:
+        analyzer.render_graph(dependency_graph, args.output, package_filter, fmt)
     
     print("\nПримеры для тестирования:")
     print("1. python cargo_analyzer.py --package serde --repo-url https://github.com/serde-rs/serde --max-depth 2")
@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from hello import COMMANDS, Session, dispatch, parse_line
+from vfs import OverlayVFS, VFSError, open_vfs
+
+PROMPT = 'vfs@'
+# Сколько последних задержек помнить для перцентилей
+LATENCY_WINDOW = 100000
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+# Очередь по умолчанию (100) меньше пачки одновременных подключений
+BACKLOG = 4096
+
+class ServerSession(Session):
+    """Сессия сервера: своя копия изменений VFS, свой cwd и счетчики"""
+
+    def __init__(self, server, vfs):
+        super().__init__(vfs, io.StringIO())
+        self.server = server
+        self.commands = 0
+        self.busy = 0.0
+
+class ShellServer:
+    """Много сессий оболочки в одном процессе над общей неизменяемой VFS"""
+
+    def __init__(self, base):
+        self.base = base
+        self.sessions = set()
+        self.total_sessions = 0
+        self.commands = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.baseline = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+    async def handle(self, reader, writer):
+        session = ServerSession(self, OverlayVFS(self.base) if self.base is not None else None)
+        self.sessions.add(session)
+        self.total_sessions += 1
+        out = session.out
+        try:
+            writer.write(PROMPT.encode())
+            await writer.drain()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t0 = time.perf_counter()
+                parsed = parse_line(line.decode('utf-8', errors='replace'))
+                # Команды короткие и считают на CPU, поэтому выполняются прямо в цикле событий:
+                # честного разделения времени между сессиями нет, медленный cat/ls задерживает
+                # остальных, и их задержка включает ожидание в очереди. Пул потоков не подходит -
+                # общая VFS заполняет ленивые кэши без блокировок.
+                running = parsed is None or dispatch(*parsed, session, commands=SERVER_COMMANDS)
+                text = out.getvalue()
+                out.seek(0)
+                out.truncate()
+                writer.write((text + PROMPT if running else text).encode('utf-8'))
+                await writer.drain()
+                latency = time.perf_counter() - t0
+                session.commands += 1
+                session.busy += latency
+                self.commands += 1
+                self.latencies.append(latency)
+                if not running:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        sessions = len(self.sessions)
+        overlays = [s.vfs.footprint() for s in self.sessions if s.vfs is not None]
+        result = {
+            'sessions': sessions,
+            'total_sessions': self.total_sessions,
+            'commands': self.commands,
+            'latency_ms': {'p50': percentile(0.5), 'p99': percentile(0.99), 'max': percentile(1.0)},
+            'overlay_bytes_avg': sum(overlays) // len(overlays) if overlays else 0,
+        }
+        if self.baseline is not None and tracemalloc.is_tracing() and sessions:
+            result['traced_bytes_per_session'] = (tracemalloc.get_traced_memory()[0] - self.baseline) // sessions
+        return result
+
+def cmd_stats(args, session):
+    server = getattr(session, 'server', None)
+    if server is None:
+        raise VFSError("доступно только в режиме сервера")
+    session.print(json.dumps(server.stats(), ensure_ascii=False))
+
+# Свой реестр сервера: общий реестр hello.py не меняется
+SERVER_COMMANDS = dict(COMMANDS, stats=cmd_stats)
+
+def parse_address(text):
+    """unix:<путь>, <хост>:<порт> или <порт>; слушать можно только localhost"""
+    if text.startswith('unix:'):
+        return 'unix', text[5:]
+    host, _, port = text.rpartition(':')
+    host = host.strip('[]') or '127.0.0.1'
+    if host not in LOCAL_HOSTS:
+        raise ValueError(f"сервер слушает только localhost, а не {host}")
+    try:
+        return 'tcp', (host, int(port))
+    except ValueError:
+        raise ValueError(f"неверный адрес {text}")
+
+async def start(server, address):
+    kind, where = address
+    if kind == 'unix':
+        if os.path.exists(where):
+            os.remove(where)
+        return await asyncio.start_unix_server(server.handle, where, limit=1 << 20, backlog=BACKLOG)
+    return await asyncio.start_server(server.handle, *where, limit=1 << 20, backlog=BACKLOG)
+
+def run_server(base, address_text, trace_memory=False):
+    """Запустить сервер до Ctrl+C; в конце напечатать статистику"""
+    try:
+        address = parse_address(address_text)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    if trace_memory:
+        tracemalloc.start()
+    server = ShellServer(base)
+
+    async def main():
+        listener = await start(server, address)
+        print(f"Сервер сессий слушает {address_text}")
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    print(json.dumps(server.stats(), ensure_ascii=False))
+
+def raise_fd_limit(needed):
+    """Каждой сессии в тесте нужно два дескриптора: клиент и сервер"""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        # RLIM_INFINITY (-1) - жесткого предела нет
+        limit = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+
+DEFAULT_BENCH_COMMANDS = ['ls /', 'cd /', 'ls', 'mkdir work', 'cd work', 'touch a b c', 'ls', 'cd ..', 'rm work/a']
+
+async def bench(base, sessions, rounds, commands, address):
+    """Открыть sessions сессий сразу, выполнить в каждой rounds раз набор команд"""
+    server = ShellServer(base)
+    listener = await start(server, address)
+    # Порт 0 - свободный порт, выбранный системой
+    where = listener.sockets[0].getsockname()
+    prompt = PROMPT.encode()
+
+    async def connect():
+        if address[0] == 'unix':
+            reader, writer = await asyncio.open_unix_connection(where, limit=1 << 20)
+        else:
+            reader, writer = await asyncio.open_connection(*where[:2], limit=1 << 20)
+        await reader.readuntil(prompt)
+        return reader, writer
+
+    async def client(reader, writer):
+        latencies = []
+        for _ in range(rounds):
+            for command in commands:
+                t0 = time.perf_counter()
+                writer.write(command.encode() + b'\n')
+                await reader.readuntil(prompt)
+                latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    async with listener:
+        t0 = time.perf_counter()
+        connections = await asyncio.gather(*(connect() for _ in range(sessions)))
+        connect_time = time.perf_counter() - t0
+        idle = server.stats()
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(client(r, w) for r, w in connections))
+        run_time = time.perf_counter() - t0
+        busy = server.stats()
+        for reader, writer in connections:
+            writer.write(b'exit\n')
+            writer.close()
+        await asyncio.gather(*(w.wait_closed() for _, w in connections), return_exceptions=True)
+
+    latencies = sorted(latency for result in results for latency in result)
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+    return {
+        'sessions': sessions,
+        'commands': len(latencies),
+        'connect_seconds': round(connect_time, 3),
+        'run_seconds': round(run_time, 3),
+        'commands_per_sec': round(len(latencies) / run_time),
+        'client_latency_ms': {'p50': percentile(0.5), 'p99': percentile(0.99), 'max': percentile(1.0)},
+        'server_idle': idle,
+        'server_after_commands': busy,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Сервер сессий оболочки VFS')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='Запустить сервер')
+    serve.add_argument('address', help='unix:<путь>, <хост>:<порт> или <порт>')
+    serve.add_argument('--vfs', help='Путь к VFS (каталог, zip, tar или образ)')
+    serve.add_argument('--trace-memory', action='store_true', help='Считать память на сессию (tracemalloc)')
+
+    load = commands.add_parser('bench', help='Нагрузочный тест в одном процессе')
+    load.add_argument('--vfs', help='Путь к VFS')
+    load.add_argument('--sessions', type=int, default=1000, help='Число одновременных сессий')
+    load.add_argument('--rounds', type=int, default=3, help='Сколько раз выполнить набор команд')
+    load.add_argument('--script', help='Файл с набором команд (по умолчанию встроенный)')
+    load.add_argument('--address', default='unix:/tmp/vfs_shell_bench.sock', help='Адрес сервера')
+    load.add_argument('--trace-memory', action='store_true', help='Считать память на сессию (tracemalloc, медленнее)')
+    args = parser.parse_args()
+
+    base = None
+    if args.vfs:
+        try:
+            base = open_vfs(args.vfs)
+        except VFSError as e:
+            print(f"Ошибка: не удалось загрузить VFS: {e}")
+            sys.exit(1)
+
+    if args.command == 'serve':
+        run_server(base, args.address, args.trace_memory)
+        return
+
+    if args.sessions <= 0 or args.rounds <= 0:
+        print("Ошибка: число сессий и повторов должно быть > 0")
+        sys.exit(1)
+    script = DEFAULT_BENCH_COMMANDS
+    if args.script:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            script = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    try:
+        address = parse_address(args.address)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    raise_fd_limit(2 * args.sessions + 64)
+    if args.trace_memory:
+        tracemalloc.start()
+    result = asyncio.run(bench(base, args.sessions, args.rounds, script, address))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
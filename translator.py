@@ -0,0 +1,124 @@
+import hashlib
+import marshal
+import os
+import sys
+
+from bitrev import REV16, bitrev32
+
+# Коды операций (совпадают с interpreter.py)
+OP_LOAD = 15
+OP_READ = 17
+OP_WRITE = 8
+OP_BITREV = 25
+
+# Число команд в одной сгенерированной функции
+BLOCK_SIZE = 10000
+
+REGS = ', '.join(f'r{i}' for i in range(32))
+
+# Кэш в памяти процесса: (хэш бинарника, размер памяти) -> список code-объектов
+_cache = {}
+
+def _translate_block(program, mem_size, dense):
+    """Сгенерировать исходный код функции для части программы"""
+    if dense:
+        read, write = 'mem[{}]', 'mem[{}] = {}'
+    else:
+        read, write = 'read({})', 'write({}, {})'
+
+    # Прямой проход: свертка констант, каждая строка - (код, регистр-результат, используемые регистры)
+    stmts = []
+    known = {}
+    for a, b, c, d in program:
+        if a == OP_LOAD:
+            stmts.append((f'r{b} = {c}', b, ()))
+            known[b] = c
+        elif a == OP_READ:
+            if c in known:
+                addr = known[c] + b
+                if addr < mem_size:
+                    stmts.append((f'r{d} = ' + read.format(addr), d, ()))
+                    known.pop(d, None)
+                else:
+                    stmts.append((f'r{d} = 0', d, ()))
+                    known[d] = 0
+            else:
+                stmts.append((f'r{d} = ' + read.format('a') + f' if (a := r{c} + {b}) < {mem_size} else 0', d, (c,)))
+                known.pop(d, None)
+        elif a == OP_WRITE:
+            if c < mem_size:
+                if b in known:
+                    stmts.append((write.format(c, known[b]), None, ()))
+                else:
+                    stmts.append((write.format(c, f'r{b}'), None, (b,)))
+        elif a == OP_BITREV:
+            if b in known:
+                prefix, rev, uses = '', str(bitrev32(known[b])), ()
+            else:
+                prefix = f'v = r{b} & 0xFFFFFFFF; '
+                rev, uses = '(REV16[v & 0xFFFF] << 16) | REV16[v >> 16]', (b,)
+            if c in known:
+                if known[c] < mem_size:
+                    stmts.append((prefix + write.format(known[c], rev), None, uses))
+            else:
+                stmts.append((f'if r{c} < {mem_size}: ' + prefix + write.format(f'r{c}', rev), None, uses + (c,)))
+
+    # Обратный проход: удаляем загрузки в регистры, которые перезаписываются до использования
+    live = set(range(32))
+    body = []
+    for text, dst, uses in reversed(stmts):
+        if dst is not None:
+            if dst not in live:
+                continue
+            live.discard(dst)
+        live.update(uses)
+        body.append('    ' + text)
+    body.reverse()
+
+    lines = ['def block(regs, mem, read, write, REV16):', f'    {REGS} = regs']
+    lines.extend(body)
+    lines.append(f'    regs[:] = [{REGS}]')
+    return '\n'.join(lines) + '\n'
+
+def translate(program, mem_size, dense=False):
+    """Оттранслировать программу в список скомпилированных функций-блоков"""
+    blocks = []
+    for pos in range(0, len(program), BLOCK_SIZE):
+        source = _translate_block(program[pos:pos + BLOCK_SIZE], mem_size, dense)
+        blocks.append(compile(source, f'<vm block {pos // BLOCK_SIZE}>', 'exec'))
+    return blocks
+
+def _cache_path(cache_dir, key):
+    tag = sys.implementation.cache_tag
+    return os.path.join(cache_dir, f'{key}.{tag}.marshal')
+
+def get_blocks(code, program, mem_size, dense=False, cache_dir=None):
+    """Взять code-объекты из кэша или оттранслировать программу"""
+    kind = 'dense' if dense else 'paged'
+    key = f'{hashlib.sha256(code).hexdigest()}-{mem_size}-{kind}'
+    blocks = _cache.get(key)
+    if blocks is not None:
+        return blocks
+
+    path = _cache_path(cache_dir, key) if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path, 'rb') as f:
+            blocks = marshal.load(f)
+    else:
+        blocks = translate(program, mem_size, dense)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, 'wb') as f:
+                marshal.dump(blocks, f)
+
+    _cache[key] = blocks
+    return blocks
+
+def run_blocks(blocks, registers, memory):
+    """Выполнить оттранслированные блоки над регистрами и памятью VM"""
+    # Для плотной памяти блоки обращаются к массиву напрямую, без вызовов
+    mem = getattr(memory, 'data', None)
+    for code in blocks:
+        namespace = {}
+        exec(code, namespace)
+        namespace['block'](registers, mem, memory.read, memory.write, REV16)
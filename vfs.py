@@ -0,0 +1,566 @@
+import argparse
+import mmap
+import os
+import posixpath
+import struct
+import sys
+import tarfile
+import tempfile
+import zipfile
+
+# Упакованный образ: заголовок, таблица записей, имена, данные файлов
+IMAGE_MAGIC = b'VFSI'
+IMAGE_VERSION = 1
+IMAGE_HEADER = struct.Struct('<4sHHIQQ')      # magic, версия, резерв, записей, смещение имен, смещение данных
+# Запись: родитель, смещение и длина имени, каталог ли, для файла - смещение и
+# размер данных, для каталога - номер первого потомка и число потомков
+IMAGE_ENTRY = struct.Struct('<IIHBxQQ')
+
+# Сколько разрешенных путей помнить
+PATH_CACHE_SIZE = 1 << 16
+
+class VFSError(Exception):
+    pass
+
+class VFS:
+    """Общая часть: разрешение путей с кэшем; узел - целое число, корень - 0"""
+
+    def __init__(self):
+        self._paths = {}
+        self._listings = {}
+
+    def _children(self, node):
+        """{имя: узел} для каталога"""
+        raise NotImplementedError
+
+    def is_dir(self, node):
+        raise NotImplementedError
+
+    def size(self, node):
+        raise NotImplementedError
+
+    def read(self, node):
+        """Содержимое файла; читается только при обращении"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    # Изменения поддерживает только OverlayVFS
+    def mkdir(self, path, cwd='/'):
+        raise VFSError("VFS только для чтения")
+
+    def create(self, path, cwd='/', data=b''):
+        raise VFSError("VFS только для чтения")
+
+    def remove(self, path, cwd='/'):
+        raise VFSError("VFS только для чтения")
+
+    def resolve(self, path, cwd='/'):
+        """Узел по пути (абсолютному или от cwd): O(глубина), повторно - из кэша"""
+        path = posixpath.normpath(posixpath.join(cwd, path))
+        if path.startswith('//'):
+            path = path[1:]
+        node = self._paths.get(path)
+        if node is not None:
+            return node, path
+        node = 0
+        for name in path.split('/'):
+            if not name:
+                continue
+            if not self.is_dir(node):
+                raise VFSError(f"{path}: не каталог")
+            node = self._children(node).get(name)
+            if node is None:
+                raise VFSError(f"{path}: нет такого файла или каталога")
+        if len(self._paths) >= PATH_CACHE_SIZE:
+            self._paths.clear()
+        self._paths[path] = node
+        return node, path
+
+    def listdir(self, node):
+        if not self.is_dir(node):
+            raise VFSError("не каталог")
+        return sorted(self._children(node))
+
+    def listing(self, node):
+        """Готовый вывод ls для каталога (каталоги с '/'), запоминается"""
+        text = self._listings.get(node)
+        if text is None:
+            text = self._listings[node] = '\n'.join(
+                name + '/' if self.is_dir(child) else name for name, child in self.entries(node))
+        return text
+
+    def entries(self, node):
+        """(имя, узел) потомков каталога по имени"""
+        children = self._children(node)
+        return [(name, children[name]) for name in sorted(children)]
+
+class TreeVFS(VFS):
+    """Дерево в памяти из центрального каталога архива; данные читаются по ключу"""
+
+    def __init__(self):
+        super().__init__()
+        self.children = [{}]
+        self.sizes = [0]
+        self.keys = [None]
+
+    def _children(self, node):
+        return self.children[node]
+
+    def is_dir(self, node):
+        return self.children[node] is not None
+
+    def size(self, node):
+        return self.sizes[node]
+
+    def _add(self, path, is_dir, size=0, key=None):
+        """Добавить путь архива, создавая промежуточные каталоги"""
+        node = 0
+        parts = [part for part in path.split('/') if part and part != '.']
+        for depth, name in enumerate(parts):
+            children = self.children[node]
+            if children is None:
+                raise VFSError(f"{path}: файл используется как каталог")
+            child = children.get(name)
+            last = depth == len(parts) - 1
+            if child is None:
+                child = children[name] = len(self.children)
+                self.children.append(None if last and not is_dir else {})
+                self.sizes.append(size if last else 0)
+                self.keys.append(key if last else None)
+            elif last and not is_dir:
+                # Повтор имени в архиве: действует последняя запись
+                self.sizes[child] = size
+                self.keys[child] = key
+            node = child
+
+class ZipVFS(TreeVFS):
+    def __init__(self, path):
+        super().__init__()
+        self.archive = zipfile.ZipFile(path)
+        for info in self.archive.infolist():
+            self._add(info.filename, info.is_dir(), info.file_size, info)
+
+    def read(self, node):
+        if self.is_dir(node):
+            raise VFSError("это каталог")
+        return self.archive.read(self.keys[node])
+
+    def close(self):
+        self.archive.close()
+
+class TarVFS(TreeVFS):
+    """tar читается один раз при открытии; несжатый архив дальше читается через mmap"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.data = None
+        try:
+            self.archive = tarfile.open(path, 'r:')
+        except tarfile.ReadError:
+            # Сжатый архив: данные придется распаковывать при чтении
+            self.archive = tarfile.open(path)
+        else:
+            with open(path, 'rb') as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        for member in self.archive:
+            if member.isdir():
+                self._add(member.name, True)
+            elif member.isreg():
+                self._add(member.name, False, member.size, member)
+
+    def read(self, node):
+        if self.is_dir(node):
+            raise VFSError("это каталог")
+        member = self.keys[node]
+        if self.data is not None:
+            return self.data[member.offset_data:member.offset_data + member.size]
+        return self.archive.extractfile(member).read()
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.archive.close()
+
+class DirectoryVFS(VFS):
+    """Каталог на диске; содержимое каталогов читается при первом обращении"""
+
+    def __init__(self, root):
+        super().__init__()
+        self.paths = [os.path.abspath(root)]
+        self.dirs = [True]
+        self.sizes = [0]
+        self.children = [None]
+
+    def _children(self, node):
+        children = self.children[node]
+        if children is None:
+            # Ссылки на файлы разыменовываются, как и при чтении; битые ссылки и ссылки
+            # на каталоги (возможны циклы) пропускаются
+            found = []
+            try:
+                with os.scandir(self.paths[node]) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                            if is_dir and entry.is_symlink():
+                                continue
+                            size = 0 if is_dir else entry.stat().st_size
+                        except OSError:
+                            continue
+                        found.append((entry.name, entry.path, is_dir, size))
+            except OSError as e:
+                raise VFSError(e.strerror or str(e))
+            children = self.children[node] = {}
+            for name, path, is_dir, size in found:
+                children[name] = len(self.paths)
+                self.paths.append(path)
+                self.dirs.append(is_dir)
+                self.sizes.append(0 if is_dir else size)
+                self.children.append(None)
+        return children
+
+    def is_dir(self, node):
+        return self.dirs[node]
+
+    def size(self, node):
+        return self.sizes[node]
+
+    def read(self, node):
+        if self.dirs[node]:
+            raise VFSError("это каталог")
+        try:
+            with open(self.paths[node], 'rb') as f:
+                return f.read()
+        except OSError as e:
+            raise VFSError(e.strerror or str(e))
+
+class ImageVFS(VFS):
+    """Упакованный образ через mmap: записи декодируются только для открытых каталогов"""
+
+    def __init__(self, path):
+        super().__init__()
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self.data) < IMAGE_HEADER.size:
+                raise VFSError(f"{path}: образ обрезан")
+            magic, version, _, self.count, self.names_offset, self.data_offset = \
+                IMAGE_HEADER.unpack_from(self.data, 0)
+            if magic != IMAGE_MAGIC or version != IMAGE_VERSION:
+                raise VFSError(f"{path}: не образ VFS")
+            # Таблица записей, имена и данные идут подряд и помещаются в файл
+            if not (self.count >= 1 and
+                    IMAGE_HEADER.size + self.count * IMAGE_ENTRY.size <= self.names_offset
+                    <= self.data_offset <= len(self.data)) or not self._entry(0)[3]:
+                raise VFSError(f"{path}: образ поврежден")
+        except VFSError:
+            self.data.close()
+            raise
+        self.children = {}
+
+    def _entry(self, node):
+        return IMAGE_ENTRY.unpack_from(self.data, IMAGE_HEADER.size + node * IMAGE_ENTRY.size)
+
+    def _children(self, node):
+        children = self.children.get(node)
+        if children is None:
+            _, _, _, is_dir, first, count = self._entry(node)
+            if first + count > self.count:
+                raise VFSError("образ поврежден")
+            children = {}
+            base = self.names_offset
+            names_size = self.data_offset - base
+            data = self.data
+            offset = IMAGE_HEADER.size + first * IMAGE_ENTRY.size
+            for child, (_, name_off, name_len, _, _, _) in enumerate(
+                    IMAGE_ENTRY.iter_unpack(data[offset:offset + count * IMAGE_ENTRY.size]), first):
+                if name_off + name_len > names_size:
+                    raise VFSError("образ поврежден")
+                try:
+                    children[data[base + name_off:base + name_off + name_len].decode('utf-8')] = child
+                except UnicodeDecodeError:
+                    raise VFSError("образ поврежден")
+            self.children[node] = children
+        return children
+
+    def is_dir(self, node):
+        return bool(self._entry(node)[3])
+
+    def size(self, node):
+        _, _, _, is_dir, _, size = self._entry(node)
+        return 0 if is_dir else size
+
+    def read(self, node):
+        _, _, _, is_dir, offset, size = self._entry(node)
+        if is_dir:
+            raise VFSError("это каталог")
+        start = self.data_offset + offset
+        if start + size > len(self.data):
+            raise VFSError("образ поврежден")
+        return self.data[start:start + size]
+
+    def close(self):
+        self.data.close()
+
+class OverlayVFS(VFS):
+    """Изменения одной сессии поверх общей неизменяемой VFS (копирование при записи).
+
+    Пока изменений нет, все запросы, включая кэш путей, идут в общую VFS.
+    Измененный каталог копируется целиком ({имя: узел}); новые узлы
+    получают отрицательные номера.
+    """
+
+    def __init__(self, base):
+        super().__init__()
+        self.base = base
+        self.dirs = {}          # узел -> {имя: узел}: скопированные и новые каталоги
+        self.files = {}         # новый узел -> содержимое
+        self.next_node = -1
+        self.modified = False
+
+    def _children(self, node):
+        children = self.dirs.get(node)
+        return self.base._children(node) if children is None else children
+
+    def is_dir(self, node):
+        return node in self.dirs if node < 0 else self.base.is_dir(node)
+
+    def size(self, node):
+        if node < 0:
+            return len(self.files.get(node, b''))
+        return self.base.size(node)
+
+    def read(self, node):
+        if node < 0:
+            if node in self.dirs:
+                raise VFSError("это каталог")
+            return self.files[node]
+        return self.base.read(node)
+
+    def resolve(self, path, cwd='/'):
+        if not self.modified:
+            return self.base.resolve(path, cwd)
+        return super().resolve(path, cwd)
+
+    def listing(self, node):
+        if node not in self.dirs:
+            return self.base.listing(node)
+        return super().listing(node)
+
+    def _split(self, path, cwd):
+        """Каталог-родитель (копия для записи) и имя в нем"""
+        full = posixpath.normpath(posixpath.join(cwd, path))
+        parent_path, name = posixpath.split(full)
+        if not name:
+            raise VFSError(f"{full}: недопустимый путь")
+        parent, _ = self.resolve(parent_path)
+        if not self.is_dir(parent):
+            raise VFSError(f"{parent_path}: не каталог")
+        children = self.dirs.get(parent)
+        if children is None:
+            children = self.dirs[parent] = dict(self.base._children(parent))
+        return children, name, full
+
+    def _new_node(self):
+        node = self.next_node
+        self.next_node -= 1
+        return node
+
+    def _changed(self):
+        self.modified = True
+        self._paths.clear()
+        self._listings.clear()
+
+    def mkdir(self, path, cwd='/'):
+        children, name, full = self._split(path, cwd)
+        if name in children:
+            raise VFSError(f"{full}: уже существует")
+        node = children[name] = self._new_node()
+        self.dirs[node] = {}
+        self._changed()
+
+    def create(self, path, cwd='/', data=b''):
+        children, name, full = self._split(path, cwd)
+        node = children.get(name)
+        if node is not None and self.is_dir(node):
+            raise VFSError(f"{full}: это каталог")
+        if node is None or node >= 0:
+            node = children[name] = self._new_node()
+        self.files[node] = bytes(data)
+        self._changed()
+
+    def remove(self, path, cwd='/'):
+        children, name, full = self._split(path, cwd)
+        node = children.get(name)
+        if node is None:
+            raise VFSError(f"{full}: нет такого файла или каталога")
+        if self.is_dir(node) and self._children(node):
+            raise VFSError(f"{full}: каталог не пуст")
+        del children[name]
+        self.dirs.pop(node, None)
+        self.files.pop(node, None)
+        self._changed()
+
+    def footprint(self):
+        """Примерный объем изменений сессии в байтах"""
+        total = sys.getsizeof(self.dirs) + sys.getsizeof(self.files)
+        for children in self.dirs.values():
+            total += sys.getsizeof(children)
+        for data in self.files.values():
+            total += sys.getsizeof(data)
+        return total
+
+def open_vfs(path):
+    """VFS по пути: упакованный образ, zip, tar или каталог; ошибки - VFSError"""
+    try:
+        return _open_vfs(path)
+    except (OSError, ValueError, struct.error, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise VFSError(f"{path}: {e}")
+
+def _open_vfs(path):
+    if os.path.isdir(path):
+        return DirectoryVFS(path)
+    if not os.path.exists(path):
+        raise VFSError(f"{path} не существует")
+    with open(path, 'rb') as f:
+        magic = f.read(len(IMAGE_MAGIC))
+    if magic == IMAGE_MAGIC:
+        return ImageVFS(path)
+    if zipfile.is_zipfile(path):
+        return ZipVFS(path)
+    if tarfile.is_tarfile(path):
+        return TarVFS(path)
+    raise VFSError(f"{path}: неизвестный формат VFS")
+
+def pack(vfs, output):
+    """Записать VFS в образ: записи в порядке обхода в ширину, потомки каталога подряд"""
+    order = [(0, 0, '')]        # (узел, номер родителя в образе, имя)
+    dirs = []                   # для каталогов: (номер первого потомка, число потомков)
+    names = bytearray()
+    i = 0
+    while i < len(order):
+        node = order[i][0]
+        if vfs.is_dir(node):
+            entries = vfs.entries(node)
+            dirs.append((len(order), len(entries)))
+            order.extend((child, i, name) for name, child in entries)
+        else:
+            dirs.append(None)
+        i += 1
+
+    records = []
+    name_offsets = []
+    for node, parent, name in order:
+        encoded = name.encode('utf-8')
+        name_offsets.append((len(names), len(encoded)))
+        names += encoded
+    names_offset = IMAGE_HEADER.size + len(order) * IMAGE_ENTRY.size
+    data_offset = names_offset + len(names)
+
+    tmp = output + '.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(IMAGE_HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION, 0, len(order), names_offset, data_offset))
+            position = 0
+            for (node, parent, _), (name_off, name_len), children in zip(order, name_offsets, dirs):
+                if children is not None:
+                    records.append(IMAGE_ENTRY.pack(parent, name_off, name_len, 1, *children))
+                else:
+                    size = vfs.size(node)
+                    records.append(IMAGE_ENTRY.pack(parent, name_off, name_len, 0, position, size))
+                    position += size
+            f.write(b''.join(records))
+            f.write(names)
+            # Данные файлов в том же порядке, без сборки в памяти
+            for node, _, _ in order:
+                if not vfs.is_dir(node):
+                    data = vfs.read(node)
+                    if len(data) != vfs.size(node):
+                        raise VFSError("размер файла изменился во время упаковки")
+                    f.write(data)
+        os.replace(tmp, output)
+    except BaseException:
+        # Недописанный образ не остается рядом с результатом
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return len(order)
+
+def self_test():
+    """Проверка упаковки каталога со ссылками; False, если что-то не так"""
+    with tempfile.TemporaryDirectory() as root:
+        src = os.path.join(root, 'src')
+        os.makedirs(os.path.join(src, 'sub'))
+        with open(os.path.join(src, 'a.txt'), 'wb') as f:
+            f.write(b'hello')
+        with open(os.path.join(src, 'sub', 'b.txt'), 'wb') as f:
+            f.write(b'world')
+        try:
+            os.symlink('a.txt', os.path.join(src, 'link'))
+            os.symlink(os.path.join(root, 'nonexistent'), os.path.join(src, 'dangling'))
+            os.symlink('sub', os.path.join(src, 'dirlink'))
+        except (OSError, NotImplementedError) as e:
+            print(f"Ссылки недоступны, проверка пропущена: {e}")
+            return True
+
+        errors = []
+        image = os.path.join(root, 'out.vfs')
+        # Ссылка на файл читается как файл, битая ссылка и ссылка на каталог пропускаются
+        vfs = DirectoryVFS(src)
+        pack(vfs, image)
+        packed = open_vfs(image)
+        names = [name for name, _ in packed.entries(0)]
+        if names != ['a.txt', 'link', 'sub']:
+            errors.append(f"записи образа {names}")
+        node, _ = packed.resolve('/link')
+        if bytes(packed.read(node)) != b'hello':
+            errors.append("содержимое ссылки на файл")
+        packed.close()
+
+        # Ошибка при упаковке не оставляет временный файл
+        vfs = DirectoryVFS(src)
+        vfs.entries(0)
+        os.remove(os.path.join(src, 'a.txt'))
+        broken = os.path.join(root, 'broken.vfs')
+        try:
+            pack(vfs, broken)
+            errors.append("упаковка без ошибки при пропавшем файле")
+        except VFSError:
+            pass
+        if os.path.exists(broken + '.tmp') or os.path.exists(broken):
+            errors.append("остался недописанный образ")
+
+    for error in errors:
+        print(f"Ошибка: {error}")
+    return not errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Упаковка VFS в образ для hello.py')
+    parser.add_argument('source', nargs='?', help='Каталог, zip или tar')
+    parser.add_argument('output', nargs='?', help='Файл образа')
+    parser.add_argument('--self-test', action='store_true', help='Проверить упаковку каталога со ссылками')
+    args = parser.parse_args()
+
+    if args.self_test:
+        if not self_test():
+            sys.exit(1)
+        print("Проверка пройдена")
+        return
+    if not args.source or not args.output:
+        parser.error("нужны source и output")
+
+    try:
+        vfs = open_vfs(args.source)
+        count = pack(vfs, args.output)
+        vfs.close()
+    except (OSError, VFSError) as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    print(f"Образ сохранен в {args.output}: записей {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import mmap
+import struct
+from array import array
+
+from vm_memory import DenseMemory, PagedMemory
+
+# Заголовок: сигнатура, версия, тип памяти (0 - плотная, 1 - страничная), биты страницы,
+# индекс следующей команды, размер памяти в словах, число страниц
+HEADER = struct.Struct('<4sHBBQQQ')
+HEADER_SIZE = 64
+MAGIC = b'VMCK'
+VERSION = 1
+REGISTERS = struct.Struct('<32Q')
+
+def save(vm, path):
+    """Сохранить PC, регистры и образ памяти VM в файл"""
+    memory = vm.memory
+    paged = isinstance(memory, PagedMemory)
+    page_bits = memory.page_bits if paged else 0
+    page_numbers = sorted(memory.pages) if paged else []
+
+    header = HEADER.pack(MAGIC, VERSION, int(paged), page_bits, vm.pc, memory.size, len(page_numbers))
+    with open(path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(REGISTERS.pack(*vm.registers))
+        if paged:
+            f.write(array('Q', page_numbers).tobytes())
+            for page_no in page_numbers:
+                f.write(memory.pages[page_no])
+        else:
+            f.write(memory.data)
+
+def restore(vm, path):
+    """Отобразить файл состояния в память VM (копирование при записи, без разбора образа)"""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    magic, version, paged, page_bits, pc, size, n_pages = HEADER.unpack_from(mm)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: не файл состояния VM")
+
+    raw = memoryview(mm)
+    offset = HEADER_SIZE
+    registers = REGISTERS.unpack_from(mm, offset)
+    offset += REGISTERS.size
+
+    if paged:
+        memory = PagedMemory(size, page_bits)
+        page_numbers = raw[offset:offset + 8 * n_pages].cast('Q')
+        offset += 8 * n_pages
+        words = raw[offset:].cast('I')
+        for i, page_no in enumerate(page_numbers):
+            memory.pages[page_no] = words[i * memory.page_size:(i + 1) * memory.page_size]
+    else:
+        memory = DenseMemory(size, raw[offset:offset + 4 * size].cast('I'))
+
+    vm.memory = memory
+    vm.mem_size = size
+    vm.registers[:] = registers
+    vm.pc = pc
+    # Ссылка на отображение, чтобы оно жило вместе с памятью VM
+    vm.state_map = mm
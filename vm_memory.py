@@ -0,0 +1,137 @@
+from array import array
+from itertools import compress
+
+# Адрес в команде WRITE занимает 27 бит
+ADDRESS_SPACE = 1 << 27
+
+class DenseMemory:
+    """Плотная память: один непрерывный массив 32-битных слов"""
+
+    def __init__(self, size=1024, data=None):
+        self.size = size
+        # data может быть готовым буфером слов, например отображением файла
+        self.data = data if data is not None else array('I', bytes(4 * size))
+        # Прямые ссылки на методы массива, без лишнего вызова Python-функции
+        self.read = self.data.__getitem__
+        self.write = self.data.__setitem__
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, addr):
+        return self.data[addr]
+
+    def __setitem__(self, addr, value):
+        self.data[addr] = value
+
+    def values(self, start, stop):
+        """Значения ячеек в диапазоне [start, stop)"""
+        return self.data[start:stop]
+
+    def store(self, start, values):
+        """Записать массив значений начиная с адреса start"""
+        self.data[start:start + len(values)] = array('I', values)
+
+    def nonzero(self, start, stop):
+        """Пары (адрес, значение) ненулевых ячеек в диапазоне [start, stop)"""
+        chunk = self.data[start:stop]
+        return zip(compress(range(start, stop), chunk), compress(chunk, chunk))
+
+    def footprint(self):
+        """Объем выделенной памяти в байтах"""
+        return self.data.itemsize * len(self.data)
+
+class PagedMemory:
+    """Разреженная память: страницы фиксированного размера выделяются при первой записи"""
+
+    def __init__(self, size=ADDRESS_SPACE, page_bits=12):
+        self.size = size
+        self.page_bits = page_bits
+        self.page_size = 1 << page_bits
+        self.page_mask = self.page_size - 1
+        self.pages = {}
+
+    def __len__(self):
+        return self.size
+
+    def read(self, addr):
+        page = self.pages.get(addr >> self.page_bits)
+        return page[addr & self.page_mask] if page is not None else 0
+
+    def write(self, addr, value):
+        page = self.pages.get(addr >> self.page_bits)
+        if page is None:
+            if not value:
+                return
+            page = array('I', bytes(4 * self.page_size))
+            self.pages[addr >> self.page_bits] = page
+        page[addr & self.page_mask] = value
+
+    def __getitem__(self, addr):
+        if not 0 <= addr < self.size:
+            raise IndexError('адрес вне памяти')
+        return self.read(addr)
+
+    def __setitem__(self, addr, value):
+        if not 0 <= addr < self.size:
+            raise IndexError('адрес вне памяти')
+        self.write(addr, value)
+
+    def values(self, start, stop):
+        """Значения ячеек в диапазоне [start, stop)"""
+        result = array('I')
+        addr = start
+        while addr < stop:
+            page_no = addr >> self.page_bits
+            offset = addr & self.page_mask
+            count = min(self.page_size - offset, stop - addr)
+            page = self.pages.get(page_no)
+            if page is None:
+                result.extend(array('I', bytes(4 * count)))
+            else:
+                result.extend(page[offset:offset + count])
+            addr += count
+        return result
+
+    def store(self, start, values):
+        """Записать массив значений начиная с адреса start"""
+        values = array('I', values)
+        pos = 0
+        while pos < len(values):
+            addr = start + pos
+            page_no = addr >> self.page_bits
+            offset = addr & self.page_mask
+            count = min(self.page_size - offset, len(values) - pos)
+            chunk = values[pos:pos + count]
+            page = self.pages.get(page_no)
+            if page is None and any(chunk):
+                page = array('I', bytes(4 * self.page_size))
+                self.pages[page_no] = page
+            if page is not None:
+                page[offset:offset + count] = chunk
+            pos += count
+
+    def nonzero(self, start, stop):
+        """Пары (адрес, значение) ненулевых ячеек; обходятся только выделенные страницы"""
+        first, last = start >> self.page_bits, (stop - 1) >> self.page_bits
+        for page_no in sorted(self.pages):
+            if page_no < first or page_no > last:
+                continue
+            base = page_no << self.page_bits
+            lo, hi = max(start, base), min(stop, base + self.page_size)
+            chunk = self.pages[page_no][lo - base:hi - base]
+            yield from zip(compress(range(lo, hi), chunk), compress(chunk, chunk))
+
+    def footprint(self):
+        """Объем выделенной памяти в байтах"""
+        return 4 * self.page_size * len(self.pages)
+
+def make_memory(kind='auto', size=ADDRESS_SPACE):
+    """Создать память нужного типа; auto выбирает плотную для малых размеров"""
+    if kind == 'auto':
+        kind = 'dense' if size <= (1 << 20) else 'paged'
+    if kind == 'dense':
+        return DenseMemory(size)
+    if kind == 'paged':
+        return PagedMemory(size)
+    raise ValueError(f"неизвестный тип памяти: {kind}")
@@ -0,0 +1,62 @@
+import struct
+from collections import Counter
+
+# Имена команд для отчета
+OP_NAMES = {15: 'LOAD', 17: 'READ', 8: 'WRITE', 25: 'BITREV'}
+
+# Размер страницы для тепловой карты памяти: 2^12 слов
+PAGE_BITS = 12
+
+# Запись трассы: индекс команды, opcode, поля b, c, d, измененный регистр (0xFF - нет), новое значение
+TRACE_RECORD = struct.Struct('<IBIIBBI')
+NO_REGISTER = 0xFF
+
+class Profiler:
+    """Счетчики и время по командам, обращения к памяти по страницам"""
+
+    def __init__(self):
+        self.counts = [0] * 32
+        self.times = [0] * 32
+        self.reads = Counter()
+        self.writes = Counter()
+
+    def report(self, top=10):
+        """Текстовый отчет по профилю"""
+        lines = ["Команда        Кол-во    Время, мс   нс/команду"]
+        for op in range(32):
+            if not self.counts[op]:
+                continue
+            name = OP_NAMES.get(op, f'op{op}')
+            ms = self.times[op] / 1e6
+            per = self.times[op] / self.counts[op]
+            lines.append(f"{name:10} {self.counts[op]:10} {ms:12.3f} {per:12.1f}")
+        for title, heat in (("Чтения", self.reads), ("Записи", self.writes)):
+            if heat:
+                lines.append(f"{title} по страницам ({1 << PAGE_BITS} слов):")
+                for page, count in heat.most_common(top):
+                    lines.append(f"  {page << PAGE_BITS:#011x}: {count}")
+        return '\n'.join(lines)
+
+class TraceWriter:
+    """Буферизованная запись трассы в компактном бинарном формате"""
+
+    def __init__(self, path, buffer_records=4096):
+        self.file = open(path, 'wb')
+        self.buffer = bytearray()
+        self.limit = buffer_records * TRACE_RECORD.size
+
+    def record(self, index, a, b, c, d, reg, value):
+        self.buffer += TRACE_RECORD.pack(index, a, b, c, d, reg, value & 0xFFFFFFFF)
+        if len(self.buffer) >= self.limit:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def close(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.close()
+
+def read_trace(path):
+    """Прочитать трассу: кортежи (индекс, opcode, b, c, d, регистр, значение)"""
+    with open(path, 'rb') as f:
+        return list(TRACE_RECORD.iter_unpack(f.read()))
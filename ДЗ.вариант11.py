@@ -5,125 +5,8 @@
 # - Lark
 # - DSL (Domain Specific Language, предметно-ориентированные языки)
 
-import tomli_w
-import lark
-
-grammar = r"""
-%ignore /\s+/
-%ignore /\*[^\n]*/      // однострочные комментарии
-%ignore /\{-[^-]*-\}/   // многострочные комментарии
-
-NUM: /0[bB][01]+/
-NAME: /[_a-zA-Z][_a-zA-Z0-9]*/
-
-start: (const | table)*
-
-const: NAME ":=" value ";"
-
-table: "table" "(" [pair ("," pair)*] ")"
-pair: NAME "=>" value
-
-array: "(" "{" [value ("," value)*] "}" ")"
-
-prefixed: "#" "[" prefix "]"
-prefix: add | sub | mul | power
-
-add: "+" value value
-sub: "-" value value
-mul: "*" value value
-power: "pow" "(" value value ")"
-
-?value: table
-      | array
-      | prefixed
-      | NAME
-      | NUM
-"""
-
-class T(lark.Transformer):
-    def __init__(self):
-        super().__init__(visit_tokens=True)
-        self.constants = {}
-    
-    def NAME(self, name):
-        return str(name)
-    
-    def NUM(self, num):
-        val = num.value
-        if val.lower().startswith('0b'):
-            return int(val[2:], 2)
-        return int(val, 2)
-    
-    def const(self, items):
-        name, val = items
-        self.constants[name] = val
-        return None
-    
-    def table(self, items):
-        if not items:
-            return {}
-        
-        result = {}
-        for key, value in items:
-            if isinstance(value, lark.Tree) and value.data == 'prefix':
-                value = value.children[0]
-            
-            if isinstance(value, str) and value in self.constants:
-                result[key] = self.constants[value]
-            else:
-                result[key] = value
-        return result
-    
-    def pair(self, items):
-        key, val = items
-        return (key, val)
-    
-    def array(self, items):
-        if items is None:
-            return []
-        
-        result = []
-        for item in items:
-            if isinstance(item, str) and item in self.constants:
-                result.append(self.constants[item])
-            else:
-                result.append(item)
-        return result
-    
-    def add(self, items):
-        a, b = items
-        a = self.constants.get(a, a) if isinstance(a, str) else a
-        b = self.constants.get(b, b) if isinstance(b, str) else b
-        return a + b
-    
-    def sub(self, items):
-        a, b = items
-        a = self.constants.get(a, a) if isinstance(a, str) else a
-        b = self.constants.get(b, b) if isinstance(b, str) else b
-        return a - b
-    
-    def mul(self, items):
-        a, b = items
-        a = self.constants.get(a, a) if isinstance(a, str) else a
-        b = self.constants.get(b, b) if isinstance(b, str) else b
-        return a * b
-    
-    def power(self, items):
-        a, b = items
-        a = self.constants.get(a, a) if isinstance(a, str) else a
-        b = self.constants.get(b, b) if isinstance(b, str) else b
-        return a ** b
-    
-    def prefixed(self, items):
-        return items[0]
-    
-    def start(self, items):
-        result = {}
-        for item in items:
-            if isinstance(item, dict):
-                result.update(item)
-        return result
-
+# Грамматика, преобразователь и пакетный режим - в config_dsl.py (импортируемый модуль)
+from config_dsl import T, grammar, parse_config, to_toml, transform
 
 INPUT = '''
 test := 0b101;
@@ -148,22 +31,7 @@ def = [42, 1]
 key = 123
 '''
 
-def transform(input: str) -> str:
-    parser = lark.Lark(grammar, parser='lalr')
-    treee = parser.parse(input)
-    
-  
-    print("Дерево парсинга:")
-    for subtree in treee.iter_subtrees():
-        indent = "▶ " * (subtree.meta.line - 1 if hasattr(subtree.meta, 'line') else 0)
-        print(f"{indent}{subtree.data}")
-        for child in subtree.children:
-            if isinstance(child, lark.Tree):
-                continue
-            print(f"{indent}{child}")
-    
-    a = T().transform(treee)
-    output = tomli_w.dumps(a)
-    return output
-
-print(transform(INPUT))
+if __name__ == "__main__":
+    import sys
+    # Дерево разбора выводится только с --debug
+    print(transform(INPUT, debug='--debug' in sys.argv))